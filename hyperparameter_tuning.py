@@ -66,7 +66,7 @@ def create_hpt_job(
     job = aiplatform.CustomContainerTrainingJob(
         display_name="qwen-hpt-training",
         container_uri=image_uri,
-        command=["python", "-m", "trainer.train"],
+        command=["torchrun", "--nproc_per_node=gpu", "-m", "trainer.train"],
     )
     
     # Submit hyperparameter tuning job
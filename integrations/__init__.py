@@ -0,0 +1 @@
+__path__=['/root/package/integrations']
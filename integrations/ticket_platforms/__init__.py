@@ -17,12 +17,14 @@ from integrations.ticket_platforms.stubhub_api import StubHubAPI
 from integrations.ticket_platforms.seatgeek_api import SeatGeekAPI
 from integrations.ticket_platforms.ticketmaster_api import TicketmasterAPI
 from integrations.ticket_platforms.unified_inventory import UnifiedInventoryAggregator
+from integrations.ticket_platforms.rate_limiter import BurstRateLimiter
 
 __all__ = [
     'StubHubAPI',
     'SeatGeekAPI',
     'TicketmasterAPI',
-    'UnifiedInventoryAggregator'
+    'UnifiedInventoryAggregator',
+    'BurstRateLimiter'
 ]
 
 __version__ = '1.0.0'
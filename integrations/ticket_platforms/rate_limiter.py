@@ -0,0 +1,58 @@
+"""
+Burst Rate Limiter for Ticket Platform APIs
+
+Sliding-window limiter that lets up to `limit` calls start immediately
+within any `period`-second window and only delays calls beyond that,
+instead of spacing every call evenly.
+
+Usage:
+    limiter = BurstRateLimiter(limit=5, period=1.0)
+
+    with limiter:
+        response = requests.get(url, params=params, timeout=10)
+"""
+
+import threading
+import time
+from collections import deque
+
+
+class BurstRateLimiter:
+    """
+    Thread-safe sliding-window rate limiter
+
+    Platform clients are synchronous and run in worker threads, so the
+    limiter blocks the calling thread (never the event loop) and only
+    sleeps until the oldest call in a full window expires.
+    """
+
+    def __init__(self, limit: int, period: float = 1.0):
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+        self.limit = limit
+        self.period = period
+        self._calls = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a call slot is available in the current window"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._calls and now - self._calls[0] >= self.period:
+                    self._calls.popleft()
+
+                if len(self._calls) < self.limit:
+                    self._calls.append(now)
+                    return
+
+                wait = self.period - (now - self._calls[0])
+
+            time.sleep(wait)
+
+    def __enter__(self) -> "BurstRateLimiter":
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
@@ -11,7 +11,8 @@ from integrations.ticket_platforms import (
     StubHubAPI,
     SeatGeekAPI,
     TicketmasterAPI,
-    UnifiedInventoryAggregator
+    UnifiedInventoryAggregator,
+    BurstRateLimiter
 )
 
 
@@ -241,6 +242,65 @@ class TestUnifiedAggregator:
             assert comparison['price_comparison']['most_expensive_price'] == 120.00
             assert comparison['price_comparison']['potential_savings'] == 35.00
             assert comparison['price_comparison']['best_platform'] == 'seatgeek'
+    
+    def test_concurrent_identical_searches_share_one_fanout(self):
+        """Duplicate in-flight searches should reuse the first search's result"""
+        aggregator = UnifiedInventoryAggregator()
+        calls = []
+        
+        async def fake_search(query, city, date_from, date_to):
+            calls.append(query)
+            await asyncio.sleep(0.05)
+            return {'events': [], 'total_events': 0}
+        
+        async def run_searches():
+            return await asyncio.gather(
+                aggregator.search_events("Lakers"),
+                aggregator.search_events("Lakers"),
+                aggregator.search_events("Warriors")
+            )
+        
+        with patch.object(aggregator, '_search_all_platforms', side_effect=fake_search):
+            first, second, third = asyncio.run(run_searches())
+        
+        assert calls == ["Lakers", "Warriors"]
+        assert first is second
+        assert aggregator._inflight == {}
+
+
+class TestBurstRateLimiter:
+    """Tests for the per-platform burst rate limiter"""
+    
+    def test_burst_is_not_delayed(self):
+        """Calls within the limit should start immediately"""
+        import time
+        
+        limiter = BurstRateLimiter(limit=5, period=1.0)
+        
+        start = time.monotonic()
+        for _ in range(5):
+            with limiter:
+                pass
+        
+        assert time.monotonic() - start < 0.1
+    
+    def test_call_past_limit_waits_for_window(self):
+        """The first call past the limit should wait for the window to slide"""
+        import time
+        
+        limiter = BurstRateLimiter(limit=2, period=0.2)
+        
+        start = time.monotonic()
+        for _ in range(3):
+            with limiter:
+                pass
+        
+        assert time.monotonic() - start >= 0.2
+    
+    def test_aggregator_has_limiter_per_platform(self):
+        """Each enabled platform should get its own limiter"""
+        aggregator = UnifiedInventoryAggregator()
+        assert set(aggregator.rate_limiters) == set(aggregator.platforms)
 
 
 @pytest.mark.asyncio
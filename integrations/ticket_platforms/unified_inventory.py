@@ -17,10 +17,12 @@ from typing import Dict, List, Optional, Any
 from datetime import datetime
 import logging
 from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
 from integrations.ticket_platforms.stubhub_api import StubHubAPI
 from integrations.ticket_platforms.seatgeek_api import SeatGeekAPI
 from integrations.ticket_platforms.ticketmaster_api import TicketmasterAPI
+from integrations.ticket_platforms.rate_limiter import BurstRateLimiter
 
 logger = logging.getLogger(__name__)
 
@@ -35,8 +37,16 @@ class UnifiedInventoryAggregator:
     - Price comparison
     - Best deal recommendations
     - Platform reliability scoring
+    - Per-platform burst rate limiting
     """
     
+    # Requests per second allowed by each platform's API
+    PLATFORM_RATE_LIMITS = {
+        'stubhub': 10,
+        'seatgeek': 10,
+        'ticketmaster': 5
+    }
+    
     def __init__(self, 
                  enable_stubhub: bool = True,
                  enable_seatgeek: bool = True,
@@ -64,6 +74,17 @@ class UnifiedInventoryAggregator:
             except Exception as e:
                 logger.warning(f"Ticketmaster initialization failed: {e}")
         
+        self.rate_limiters = {
+            platform: BurstRateLimiter(limit=self.PLATFORM_RATE_LIMITS[platform], period=1.0)
+            for platform in self.platforms
+        }
+        
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, len(self.platforms)) * 4,
+            thread_name_prefix="ticket-platform"
+        )
+        self._inflight: Dict[tuple, asyncio.Future] = {}
+        
         logger.info(f"Unified aggregator initialized with {len(self.platforms)} platforms")
     
     async def search_events(self,
@@ -74,6 +95,9 @@ class UnifiedInventoryAggregator:
         """
         Search for events across all platforms in parallel
         
+        Concurrent calls with the same arguments on the same event loop
+        share a single upstream fan-out and receive the same result.
+        
         Args:
             query: Search query (team, artist, event)
             city: City name
@@ -83,38 +107,78 @@ class UnifiedInventoryAggregator:
         Returns:
             Aggregated results from all platforms
         """
+        loop = asyncio.get_running_loop()
+        key = (loop, query, city, date_from, date_to)
+        
+        # Single-flight: identical searches already in progress share one fan-out
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+        
+        future = loop.create_future()
+        self._inflight[key] = future
+        try:
+            aggregated = await self._search_all_platforms(query, city, date_from, date_to)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved in case nobody else was waiting
+            raise
+        else:
+            future.set_result(aggregated)
+            return aggregated
+        finally:
+            del self._inflight[key]
+    
+    async def _search_all_platforms(self,
+                                    query: str,
+                                    city: Optional[str],
+                                    date_from: Optional[str],
+                                    date_to: Optional[str]) -> Dict[str, Any]:
+        """Query every platform in parallel on worker threads and aggregate"""
         start_time = datetime.now()
+        loop = asyncio.get_running_loop()
         
-        # Execute searches in parallel
-        with ThreadPoolExecutor(max_workers=len(self.platforms)) as executor:
-            futures = {}
-            
-            if 'stubhub' in self.platforms:
-                futures['stubhub'] = executor.submit(
-                    self.platforms['stubhub'].search_events,
-                    query, city, date_from, date_to
-                )
-            
-            if 'seatgeek' in self.platforms:
-                futures['seatgeek'] = executor.submit(
-                    self.platforms['seatgeek'].search_events,
-                    query, city=city, date_from=date_from, date_to=date_to
-                )
-            
-            if 'ticketmaster' in self.platforms:
-                futures['ticketmaster'] = executor.submit(
-                    self.platforms['ticketmaster'].search_events,
-                    keyword=query, city=city, start_date=date_from, end_date=date_to
-                )
-            
-            # Collect results
-            results = {}
-            for platform, future in futures.items():
-                try:
-                    results[platform] = future.result(timeout=10)
-                except Exception as e:
-                    logger.error(f"Error fetching from {platform}: {e}")
-                    results[platform] = []
+        calls = {}
+        
+        if 'stubhub' in self.platforms:
+            calls['stubhub'] = partial(
+                self._rate_limited, 'stubhub',
+                self.platforms['stubhub'].search_events,
+                query, city, date_from, date_to
+            )
+        
+        if 'seatgeek' in self.platforms:
+            calls['seatgeek'] = partial(
+                self._rate_limited, 'seatgeek',
+                self.platforms['seatgeek'].search_events,
+                query, city=city, date_from=date_from, date_to=date_to
+            )
+        
+        if 'ticketmaster' in self.platforms:
+            calls['ticketmaster'] = partial(
+                self._rate_limited, 'ticketmaster',
+                self.platforms['ticketmaster'].search_events,
+                keyword=query, city=city, start_date=date_from, end_date=date_to
+            )
+        
+        # Execute searches in parallel without blocking the event loop
+        responses = await asyncio.gather(
+            *(asyncio.wait_for(loop.run_in_executor(self._executor, call), timeout=10)
+              for call in calls.values()),
+            return_exceptions=True
+        )
+        
+        # Collect results
+        results = {}
+        for platform, response in zip(calls, responses):
+            if isinstance(response, Exception):
+                logger.error(f"Error fetching from {platform}: {response}")
+                results[platform] = []
+            else:
+                results[platform] = response
         
         # Aggregate and deduplicate
         aggregated = self._aggregate_events(results)
@@ -125,6 +189,11 @@ class UnifiedInventoryAggregator:
         
         return aggregated
     
+    def _rate_limited(self, platform: str, func, *args, **kwargs):
+        """Call a platform API method once its burst limiter allows it"""
+        with self.rate_limiters[platform]:
+            return func(*args, **kwargs)
+    
     def _aggregate_events(self, results: Dict[str, List[Dict]]) -> Dict[str, Any]:
         """
         Aggregate and deduplicate events from multiple platforms
@@ -243,11 +312,23 @@ class UnifiedInventoryAggregator:
         """
         Compare prices for the same event across platforms
         
+        Synchronous wrapper around compare_prices_async; must not be called
+        from a running event loop.
+        
+        Returns:
+            Price comparison with savings analysis
+        """
+        return asyncio.run(self.compare_prices_async(event_name, venue, date))
+    
+    async def compare_prices_async(self, event_name: str, venue: str, date: str) -> Dict[str, Any]:
+        """
+        Compare prices for the same event across platforms
+        
         Returns:
             Price comparison with savings analysis
         """
         # Search all platforms
-        results = asyncio.run(self.search_events(event_name, city=venue.split(',')[0] if ',' in venue else None))
+        results = await self.search_events(event_name, city=venue.split(',')[0] if ',' in venue else None)
         
         # Find matching event
         matching_events = [
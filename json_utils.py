@@ -0,0 +1,52 @@
+"""
+JSON helpers shared by the API, dashboards and agent tools.
+
+Encodes and decodes with orjson when it is installed, falling back to the
+stdlib json module otherwise.
+"""
+
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    from starlette.responses import JSONResponse
+    HAS_STARLETTE = True
+except ImportError:
+    HAS_STARLETTE = False
+
+
+def json_dumps_bytes(obj: Any) -> bytes:
+    """Serialize obj to compact JSON bytes; non-string dict keys are allowed."""
+    if HAS_ORJSON:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def json_dumps(obj: Any) -> str:
+    """Serialize obj to a compact JSON string."""
+    if HAS_ORJSON:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(obj, separators=(",", ":"))
+
+
+def json_loads(data: Union[str, bytes]) -> Any:
+    """Deserialize a JSON document."""
+    if HAS_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+if HAS_STARLETTE:
+    class ORJSONResponse(JSONResponse):
+        """JSONResponse encoded with orjson when it is installed."""
+
+        def render(self, content: Any) -> bytes:
+            if HAS_ORJSON:
+                return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+            return super().render(content)
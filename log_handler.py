@@ -1,14 +1,23 @@
 from google.cloud import bigquery
-import json
+import atexit
 import datetime
 import os
-from typing import Optional, Dict, Any
+import queue
+import threading
+from typing import Optional, Dict, Any, List
 import structlog
 
+from json_utils import json_dumps
+
 logger = structlog.get_logger()
 
 
 class ConversationLogger:
+    # Rows are buffered in-process and streamed to BigQuery in batches by a
+    # background thread, so logging never blocks the request path.
+    FLUSH_MAX_ROWS = 500
+    FLUSH_INTERVAL_SECONDS = 2.0
+
     def __init__(self, project_id: Optional[str] = None, dataset_id: str = "messaging_logs"):
         self.project_id = project_id or os.getenv("PROJECT_ID")
         if not self.project_id:
@@ -19,6 +28,13 @@ class ConversationLogger:
         self.table_id = "conversations"
         self._ensure_table_exists()
 
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name="bigquery-log-flusher", daemon=True)
+        self._flusher.start()
+        atexit.register(self.flush)
+
     def _ensure_table_exists(self):
         """Create the conversations table if it doesn't exist."""
         dataset_ref = self.client.dataset(self.dataset_id)
@@ -60,33 +76,58 @@ class ConversationLogger:
         duration_ms: Optional[int] = None,
         status: str = "success"
     ):
-        """Log a conversation interaction to BigQuery."""
+        """Queue a conversation interaction for the next BigQuery batch."""
+        # Serialized here so unserializable metadata fails this call alone
+        # and later changes to the caller's dict don't reach the row
+        self._queue.put(
+            {
+                "conversation_id": conversation_id,
+                "user_message": user_message,
+                "agent_response": agent_response,
+                "metadata": json_dumps(metadata or {}),
+                "timestamp": datetime.datetime.utcnow().isoformat(),
+                "request_id": request_id,
+                "duration_ms": duration_ms,
+                "message_length": len(user_message),
+                "response_length": len(agent_response),
+                "status": status,
+            }
+        )
+        if self._queue.qsize() >= self.FLUSH_MAX_ROWS:
+            self._wakeup.set()
+
+    def flush(self):
+        """Insert every queued row into BigQuery, FLUSH_MAX_ROWS at a time."""
+        with self._flush_lock:
+            while True:
+                batch: List[Dict[str, Any]] = []
+                try:
+                    while len(batch) < self.FLUSH_MAX_ROWS:
+                        batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    pass
+                if not batch:
+                    return
+                self._insert_rows(batch)
+
+    def _flush_loop(self):
+        while True:
+            self._wakeup.wait(self.FLUSH_INTERVAL_SECONDS)
+            self._wakeup.clear()
+            self.flush()
+
+    def _insert_rows(self, rows: List[Dict[str, Any]]):
         try:
-            rows_to_insert = [
-                {
-                    "conversation_id": conversation_id,
-                    "user_message": user_message,
-                    "agent_response": agent_response,
-                    "metadata": json.dumps(metadata or {}),
-                    "timestamp": datetime.datetime.utcnow().isoformat(),
-                    "request_id": request_id,
-                    "duration_ms": duration_ms,
-                    "message_length": len(user_message),
-                    "response_length": len(agent_response),
-                    "status": status,
-                }
-            ]
-            
             table_ref = f"{self.client.project}.{self.dataset_id}.{self.table_id}"
-            errors = self.client.insert_rows_json(table_ref, rows_to_insert)
+            errors = self.client.insert_rows_json(table_ref, rows)
             
             if errors:
                 logger.error("BigQuery insert errors", errors=errors)
             else:
-                logger.info("Logged conversation to BigQuery", conversation_id=conversation_id)
+                logger.info("Logged conversations to BigQuery", rows=len(rows))
                 
         except Exception as e:
-            logger.error("Failed to log conversation", error=str(e))
+            logger.error("Failed to log conversations", error=str(e), rows=len(rows))
 
     def log_error(
         self,
@@ -142,7 +142,7 @@ def train_model(
         per_device_eval_batch_size=batch_size,
         gradient_accumulation_steps=4,
         gradient_checkpointing=True,
-        optim="paged_adamw_32bit",
+        optim="adamw_bnb_8bit",
         learning_rate=learning_rate,
         lr_scheduler_type="cosine",
         warmup_ratio=0.03,
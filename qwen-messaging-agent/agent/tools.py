@@ -1,6 +1,11 @@
-import json
-import datetime
-from typing import List, Dict, Any, Callable, Optional
+import atexit
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Dict, Any, Callable, Optional, Tuple
+
+import numpy as np
+
+from json_utils import json_dumps, json_dumps_bytes, json_loads
 
 
 class ToolRegistry:
@@ -8,6 +13,8 @@ class ToolRegistry:
 
     def __init__(self):
         self.tools: Dict[str, Dict[str, Any]] = {}
+        self._definitions: Optional[List[Dict[str, Any]]] = None
+        self._definitions_json: Optional[str] = None
 
     def register(self, name: str, description: str, parameters: Dict):
         def decorator(func: Callable[..., Any]):
@@ -16,13 +23,15 @@ class ToolRegistry:
                 "description": description,
                 "parameters": parameters,
             }
+            self._definitions = None
+            self._definitions_json = None
             return func
         return decorator
 
     def get_tool_definitions(self) -> List[Dict[str, Any]]:
-        definitions = []
-        for name, tool in self.tools.items():
-            definitions.append(
+        """Tool definitions, built once and shared until the next register(); do not mutate."""
+        if self._definitions is None:
+            self._definitions = [
                 {
                     "type": "function",
                     "function": {
@@ -31,8 +40,15 @@ class ToolRegistry:
                         "parameters": tool["parameters"],
                     },
                 }
-            )
-        return definitions
+                for name, tool in self.tools.items()
+            ]
+        return self._definitions
+
+    def get_tool_definitions_json(self) -> str:
+        """Serialized tool definitions, built once and reused until the next register()."""
+        if self._definitions_json is None:
+            self._definitions_json = json_dumps(self.get_tool_definitions())
+        return self._definitions_json
 
     def execute(self, name: str, arguments: Dict[str, Any]) -> Any:
         if name not in self.tools:
@@ -76,9 +92,12 @@ def send_message(recipient: str, message: str) -> str:
 def check_inventory(event_id: str, quantity: int, section: Optional[str] = None) -> Dict[str, Any]:
     # TODO: Query your ticketing inventory
     base_section = section or "A"
+    idx = np.arange(1, quantity + 1)
+    prices = (120.0 + idx * 5.0).tolist()
+    rows = (5 + idx).astype(str).tolist()
     seats = [
-        {"id": f"{base_section}-{i}", "price": 120.0 + i * 5, "section": base_section, "row": str(5 + i)}
-        for i in range(1, quantity + 1)
+        {"id": f"{base_section}-{i}", "price": price, "section": base_section, "row": row}
+        for i, price, row in zip(idx.tolist(), prices, rows)
     ]
     return {"event_id": event_id, "seats": seats}
 
@@ -98,8 +117,9 @@ def check_inventory(event_id: str, quantity: int, section: Optional[str] = None)
 )
 def hold_tickets(event_id: str, seat_ids: List[str], expires_in_seconds: int = 300) -> Dict[str, Any]:
     # TODO: Create a real hold in your system
-    hold_id = f"HOLD_{int(datetime.datetime.utcnow().timestamp())}"
-    expires_at = (datetime.datetime.utcnow() + datetime.timedelta(seconds=expires_in_seconds)).isoformat() + "Z"
+    now_s = time.time_ns() // 1_000_000_000
+    hold_id = f"HOLD_{now_s}"
+    expires_at = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(now_s + expires_in_seconds))
     return {"hold_id": hold_id, "event_id": event_id, "seat_ids": seat_ids, "expires_at": expires_at}
 
 
@@ -118,7 +138,7 @@ def hold_tickets(event_id: str, seat_ids: List[str], expires_in_seconds: int = 3
 )
 def create_order(hold_id: str, customer_id: str, payment_method_token: str) -> Dict[str, Any]:
     # TODO: Charge and create order in your OMS
-    order_id = f"ORD_{int(datetime.datetime.utcnow().timestamp())}"
+    order_id = f"ORD_{time.time_ns() // 1_000_000_000}"
     return {"order_id": order_id, "status": "confirmed", "customer_id": customer_id, "hold_id": hold_id}
 
 
@@ -169,42 +189,96 @@ def get_event_info(event_id: str) -> Dict[str, Any]:
     return {"event_id": event_id, "name": "Pro Sports Game", "start_time": "2025-10-07T19:00:00Z", "venue": "Main Arena"}
 
 
+# Shared by every streaming agent to run tool calls while generation continues
+_tool_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="tool-call")
+atexit.register(_tool_executor.shutdown, wait=False)
+
+
 class ToolCallingAgent:
-    def __init__(self, endpoint, tool_registry: ToolRegistry):
+    TOOL_CALL_CLOSE = b"</tool_call>"
+
+    def __init__(self, endpoint, tool_registry: ToolRegistry, stream: bool = False):
         self.endpoint = endpoint
         self.tools = tool_registry
+        # Streaming requires an endpoint that supports streamRawPredict and
+        # emits one JSON object per line with the next text delta in "response".
+        self.stream = stream
 
     def chat(self, user_message: str, conversation_history: List[Dict]) -> str:
+        predict = self.endpoint.predict
+        execute = self.tools.execute
         messages = [
             {
                 "role": "system",
-                "content": f"You have access to these tools: {json.dumps(self.tools.get_tool_definitions())}",
+                "content": f"You have access to these tools: {self.tools.get_tool_definitions_json()}",
             }
         ]
+        append = messages.append
         messages.extend(conversation_history)
-        messages.append({"role": "user", "content": user_message})
+        append({"role": "user", "content": user_message})
 
-        response = self.endpoint.predict(instances=[{"messages": messages}])
-        assistant_message = response.predictions[0]["response"]
+        pending_tool = None
+        if self.stream:
+            assistant_message, pending_tool = self._stream_predict(messages)
+        else:
+            response = predict(instances=[{"messages": messages}])
+            assistant_message = response.predictions[0]["response"]
 
         if "<tool_call>" in assistant_message:
-            tool_call = self._parse_tool_call(assistant_message)
-            tool_result = self.tools.execute(tool_call["name"], tool_call["arguments"])
+            if pending_tool is not None:
+                tool_result = pending_tool.result()
+            else:
+                tool_call = self._parse_tool_call(assistant_message)
+                tool_result = execute(tool_call["name"], tool_call["arguments"])
 
-            messages.append({"role": "assistant", "content": assistant_message})
-            messages.append({"role": "tool", "content": str(tool_result)})
+            append({"role": "assistant", "content": assistant_message})
+            append({"role": "tool", "content": str(tool_result)})
 
-            final = self.endpoint.predict(instances=[{"messages": messages}])
+            final = predict(instances=[{"messages": messages}])
             return final.predictions[0]["response"]
 
         return assistant_message
 
+    def _stream_predict(self, messages: List[Dict]) -> Tuple[str, Optional[Future]]:
+        """Stream the assistant turn and start the tool call as soon as its closing tag arrives.
+
+        Returns the full assistant message and, if a tool call was dispatched,
+        a Future for its result, so tool execution overlaps the rest of generation.
+        """
+        body = json_dumps_bytes({"instances": [{"messages": messages}]})
+        buffer = bytearray()
+        scan_from = 0
+        pending_tool = None
+
+        for line in self.endpoint.stream_raw_predict(body=body, headers={"Content-Type": "application/json"}):
+            buffer += self._stream_delta(line)
+            if pending_tool is not None:
+                continue
+            end = buffer.find(self.TOOL_CALL_CLOSE, scan_from)
+            if end == -1:
+                # The closing tag may straddle two chunks
+                scan_from = max(0, len(buffer) - len(self.TOOL_CALL_CLOSE) + 1)
+                continue
+            tool_call = self._parse_tool_call(buffer[: end + len(self.TOOL_CALL_CLOSE)].decode("utf-8", "replace"))
+            pending_tool = _tool_executor.submit(self.tools.execute, tool_call["name"], tool_call["arguments"])
+
+        return buffer.decode("utf-8", "replace"), pending_tool
+
+    @staticmethod
+    def _stream_delta(line: bytes) -> bytes:
+        line = line.strip()
+        if line.startswith(b"data:"):
+            line = line[5:].strip()
+        if not line or line == b"[DONE]":
+            return b""
+        return json_loads(line).get("response", "").encode("utf-8")
+
     def _parse_tool_call(self, message: str) -> Dict:
         import re
 
         match = re.search(r"<tool_call>(.*?)</tool_call>", message, re.DOTALL)
         if match:
-            return json.loads(match.group(1))
+            return json_loads(match.group(1))
         return {"name": "", "arguments": {}}
 
 
@@ -5,20 +5,32 @@ Updated tools that integrate with StubHub, SeatGeek, and Ticketmaster
 for real-time ticket inventory and pricing.
 
 Usage:
-    from agent.tools_with_platforms import registry, get_unified_inventory
+    from agent.tools_with_platforms import registry, search_tickets
     
     # Search across all platforms
-    results = get_unified_inventory("Lakers", city="Los Angeles")
+    results = await search_tickets("Lakers", city="Los Angeles")
 """
 
-import json
-import datetime
+import time
 import asyncio
-from typing import List, Dict, Any, Callable, Optional
+import atexit
+import inspect
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Dict, Any, Callable, Optional, Tuple
 import sys
+
+import numpy as np
 sys.path.append('../..')
 
 from integrations.ticket_platforms import UnifiedInventoryAggregator
+from json_utils import json_dumps, json_dumps_bytes, json_loads
+
+try:
+    import uvloop
+    HAS_UVLOOP = True
+except ImportError:
+    HAS_UVLOOP = False
 
 
 class ToolRegistry:
@@ -26,6 +38,8 @@ class ToolRegistry:
 
     def __init__(self):
         self.tools: Dict[str, Dict[str, Any]] = {}
+        self._definitions: Optional[List[Dict[str, Any]]] = None
+        self._definitions_json: Optional[str] = None
 
     def register(self, name: str, description: str, parameters: Dict):
         def decorator(func: Callable[..., Any]):
@@ -34,13 +48,15 @@ class ToolRegistry:
                 "description": description,
                 "parameters": parameters,
             }
+            self._definitions = None
+            self._definitions_json = None
             return func
         return decorator
 
     def get_tool_definitions(self) -> List[Dict[str, Any]]:
-        definitions = []
-        for name, tool in self.tools.items():
-            definitions.append(
+        """Tool definitions, built once and shared until the next register(); do not mutate."""
+        if self._definitions is None:
+            self._definitions = [
                 {
                     "type": "function",
                     "function": {
@@ -49,14 +65,29 @@ class ToolRegistry:
                         "parameters": tool["parameters"],
                     },
                 }
-            )
-        return definitions
+                for name, tool in self.tools.items()
+            ]
+        return self._definitions
+
+    def get_tool_definitions_json(self) -> str:
+        """Serialized tool definitions, built once and reused until the next register()."""
+        if self._definitions_json is None:
+            self._definitions_json = json_dumps(self.get_tool_definitions())
+        return self._definitions_json
 
     def execute(self, name: str, arguments: Dict[str, Any]) -> Any:
+        """Call a tool; coroutine-function tools return an awaitable."""
         if name not in self.tools:
             raise ValueError(f"Tool {name} not found")
         return self.tools[name]["function"](**arguments)
 
+    async def execute_async(self, name: str, arguments: Dict[str, Any]) -> Any:
+        """Call a tool and await its result if it is a coroutine function."""
+        result = self.execute(name, arguments)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
 
 registry = ToolRegistry()
 
@@ -71,6 +102,30 @@ def get_aggregator() -> UnifiedInventoryAggregator:
     return _aggregator
 
 
+# Persistent event loop per thread for synchronous callers of the async chat
+# path, so a turn does not pay for creating and tearing down a loop each time.
+_runners = threading.local()
+
+def _run(coro):
+    """Run a coroutine on this thread's long-lived asyncio.Runner"""
+    runner = getattr(_runners, "runner", None)
+    if runner is None:
+        runner = asyncio.Runner(loop_factory=uvloop.new_event_loop if HAS_UVLOOP else None)
+        atexit.register(runner.close)
+        _runners.runner = runner
+    return runner.run(coro)
+
+
+# Worker threads, each with its own runner, for sync chat calls made from
+# inside a running event loop, where this thread's runner can't be used
+_sync_chat_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="sync-chat")
+atexit.register(_sync_chat_executor.shutdown, wait=False)
+
+# Shared by every streaming agent to run tool calls while generation continues
+_tool_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="tool-call")
+atexit.register(_tool_executor.shutdown, wait=False)
+
+
 @registry.register(
     name="search_tickets",
     description="Search for tickets across StubHub, SeatGeek, and Ticketmaster",
@@ -85,7 +140,7 @@ def get_aggregator() -> UnifiedInventoryAggregator:
         "required": ["query"],
     },
 )
-def search_tickets(query: str, 
+async def search_tickets(query: str, 
                   city: Optional[str] = None,
                   date_from: Optional[str] = None,
                   date_to: Optional[str] = None) -> Dict[str, Any]:
@@ -96,13 +151,12 @@ def search_tickets(query: str,
     """
     aggregator = get_aggregator()
     
-    # Run async search
-    results = asyncio.run(aggregator.search_events(
+    results = await aggregator.search_events(
         query=query,
         city=city,
         date_from=date_from,
         date_to=date_to
-    ))
+    )
     
     return {
         "query": query,
@@ -126,14 +180,14 @@ def search_tickets(query: str,
         "required": ["event_name", "venue", "date"],
     },
 )
-def compare_prices(event_name: str, venue: str, date: str) -> Dict[str, Any]:
+async def compare_prices(event_name: str, venue: str, date: str) -> Dict[str, Any]:
     """
     Compare prices for the same event across all platforms
     
     Returns price comparison with savings recommendations
     """
     aggregator = get_aggregator()
-    comparison = aggregator.compare_prices(event_name, venue, date)
+    comparison = await aggregator.compare_prices_async(event_name, venue, date)
     
     return comparison
 
@@ -152,7 +206,7 @@ def compare_prices(event_name: str, venue: str, date: str) -> Dict[str, Any]:
         "required": ["query"],
     },
 )
-def find_best_deals(query: str,
+async def find_best_deals(query: str,
                    max_price: Optional[float] = None,
                    min_tickets: int = 1,
                    city: Optional[str] = None) -> Dict[str, Any]:
@@ -164,7 +218,7 @@ def find_best_deals(query: str,
     aggregator = get_aggregator()
     
     # Search events
-    results = asyncio.run(aggregator.search_events(query, city=city))
+    results = await aggregator.search_events(query, city=city)
     
     # Find best deals
     deals = aggregator.find_best_deals(
@@ -173,6 +227,11 @@ def find_best_deals(query: str,
         min_tickets=min_tickets
     )
     
+    # Unique platforms across all deals, in first-seen order
+    platforms = list(dict.fromkeys(
+        p['platform'] for event in deals for p in event.get('platforms', ())
+    )) if deals else []
+    
     return {
         "query": query,
         "filters": {
@@ -182,7 +241,7 @@ def find_best_deals(query: str,
         },
         "total_deals_found": len(deals),
         "best_deals": deals[:10],  # Top 10 deals
-        "platforms": list(set(p['platform'] for event in deals for p in event.get('platforms', [])))
+        "platforms": platforms
     }
 
 
@@ -202,9 +261,12 @@ def find_best_deals(query: str,
 def check_inventory(event_id: str, quantity: int, section: Optional[str] = None) -> Dict[str, Any]:
     """Legacy function - kept for backward compatibility"""
     base_section = section or "A"
+    idx = np.arange(1, quantity + 1)
+    prices = (120.0 + idx * 5.0).tolist()
+    rows = (5 + idx).astype(str).tolist()
     seats = [
-        {"id": f"{base_section}-{i}", "price": 120.0 + i * 5, "section": base_section, "row": str(5 + i)}
-        for i in range(1, quantity + 1)
+        {"id": f"{base_section}-{i}", "price": price, "section": base_section, "row": row}
+        for i, price, row in zip(idx.tolist(), prices, rows)
     ]
     return {"event_id": event_id, "seats": seats}
 
@@ -224,8 +286,9 @@ def check_inventory(event_id: str, quantity: int, section: Optional[str] = None)
 )
 def hold_tickets(event_id: str, seat_ids: List[str], expires_in_seconds: int = 300) -> Dict[str, Any]:
     """Place a hold on tickets"""
-    hold_id = f"HOLD_{int(datetime.datetime.utcnow().timestamp())}"
-    expires_at = (datetime.datetime.utcnow() + datetime.timedelta(seconds=expires_in_seconds)).isoformat() + "Z"
+    now_s = time.time_ns() // 1_000_000_000
+    hold_id = f"HOLD_{now_s}"
+    expires_at = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(now_s + expires_in_seconds))
     return {"hold_id": hold_id, "event_id": event_id, "seat_ids": seat_ids, "expires_at": expires_at}
 
 
@@ -244,7 +307,7 @@ def hold_tickets(event_id: str, seat_ids: List[str], expires_in_seconds: int = 3
 )
 def create_order(hold_id: str, customer_id: str, payment_method_token: str) -> Dict[str, Any]:
     """Create an order"""
-    order_id = f"ORD_{int(datetime.datetime.utcnow().timestamp())}"
+    order_id = f"ORD_{time.time_ns() // 1_000_000_000}"
     return {"order_id": order_id, "status": "confirmed", "customer_id": customer_id, "hold_id": hold_id}
 
 
@@ -296,39 +359,109 @@ def get_event_info(event_id: str) -> Dict[str, Any]:
 
 
 class ToolCallingAgent:
-    def __init__(self, endpoint, tool_registry: ToolRegistry):
+    TOOL_CALL_CLOSE = b"</tool_call>"
+
+    def __init__(self, endpoint, tool_registry: ToolRegistry, stream: bool = False):
         self.endpoint = endpoint
         self.tools = tool_registry
+        # Streaming requires an endpoint that supports streamRawPredict and
+        # emits one JSON object per line with the next text delta in "response".
+        self.stream = stream
 
     def chat(self, user_message: str, conversation_history: List[Dict]) -> str:
+        """Synchronous wrapper around chat_async.
+
+        Called from inside a running event loop, the turn runs on a worker
+        thread and blocks the caller like any sync call; async callers
+        should await chat_async instead.
+        """
+        coro = self.chat_async(user_message, conversation_history)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return _run(coro)
+        return _sync_chat_executor.submit(_run, coro).result()
+
+    async def chat_async(self, user_message: str, conversation_history: List[Dict]) -> str:
+        predict = self.endpoint.predict
+        execute_async = self.tools.execute_async
         messages = [
             {
                 "role": "system",
-                "content": f"You have access to these tools: {json.dumps(self.tools.get_tool_definitions())}",
+                "content": f"You have access to these tools: {self.tools.get_tool_definitions_json()}",
             }
         ]
+        append = messages.append
         messages.extend(conversation_history)
-        messages.append({"role": "user", "content": user_message})
+        append({"role": "user", "content": user_message})
 
-        response = self.endpoint.predict(instances=[{"messages": messages}])
-        assistant_message = response.predictions[0]["response"]
+        pending_tool = None
+        if self.stream:
+            assistant_message, pending_tool = await asyncio.to_thread(self._stream_predict, messages)
+        else:
+            response = await asyncio.to_thread(predict, instances=[{"messages": messages}])
+            assistant_message = response.predictions[0]["response"]
 
         if "<tool_call>" in assistant_message:
-            tool_call = self._parse_tool_call(assistant_message)
-            tool_result = self.tools.execute(tool_call["name"], tool_call["arguments"])
+            if pending_tool is not None:
+                tool_result = await asyncio.wrap_future(pending_tool)
+            else:
+                tool_call = self._parse_tool_call(assistant_message)
+                tool_result = await execute_async(tool_call["name"], tool_call["arguments"])
 
-            messages.append({"role": "assistant", "content": assistant_message})
-            messages.append({"role": "tool", "content": str(tool_result)})
+            append({"role": "assistant", "content": assistant_message})
+            append({"role": "tool", "content": str(tool_result)})
 
-            final = self.endpoint.predict(instances=[{"messages": messages}])
+            final = await asyncio.to_thread(predict, instances=[{"messages": messages}])
             return final.predictions[0]["response"]
 
         return assistant_message
 
+    def _stream_predict(self, messages: List[Dict]) -> Tuple[str, Optional[Future]]:
+        """Stream the assistant turn and start the tool call as soon as its closing tag arrives.
+
+        Returns the full assistant message and, if a tool call was dispatched,
+        a Future for its result, so tool execution overlaps the rest of generation.
+        """
+        body = json_dumps_bytes({"instances": [{"messages": messages}]})
+        buffer = bytearray()
+        scan_from = 0
+        pending_tool = None
+
+        for line in self.endpoint.stream_raw_predict(body=body, headers={"Content-Type": "application/json"}):
+            buffer += self._stream_delta(line)
+            if pending_tool is not None:
+                continue
+            end = buffer.find(self.TOOL_CALL_CLOSE, scan_from)
+            if end == -1:
+                # The closing tag may straddle two chunks
+                scan_from = max(0, len(buffer) - len(self.TOOL_CALL_CLOSE) + 1)
+                continue
+            tool_call = self._parse_tool_call(buffer[: end + len(self.TOOL_CALL_CLOSE)].decode("utf-8", "replace"))
+            pending_tool = _tool_executor.submit(self._execute_tool, tool_call["name"], tool_call["arguments"])
+
+        return buffer.decode("utf-8", "replace"), pending_tool
+
+    def _execute_tool(self, name: str, arguments: Dict[str, Any]) -> Any:
+        """Run a tool to completion from a worker thread, including async tools."""
+        result = self.tools.execute(name, arguments)
+        if inspect.isawaitable(result):
+            result = _run(result)
+        return result
+
+    @staticmethod
+    def _stream_delta(line: bytes) -> bytes:
+        line = line.strip()
+        if line.startswith(b"data:"):
+            line = line[5:].strip()
+        if not line or line == b"[DONE]":
+            return b""
+        return json_loads(line).get("response", "").encode("utf-8")
+
     def _parse_tool_call(self, message: str) -> Dict:
         import re
 
         match = re.search(r"<tool_call>(.*?)</tool_call>", message, re.DOTALL)
         if match:
-            return json.loads(match.group(1))
+            return json_loads(match.group(1))
         return {"name": "", "arguments": {}}
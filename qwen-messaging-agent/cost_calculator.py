@@ -1,3 +1,6 @@
+from typing import Dict, Tuple
+
+
 class VertexAICostCalculator:
     """Calculate estimated costs for Vertex AI training and inference."""
 
@@ -23,8 +26,7 @@ class VertexAICostCalculator:
         accelerator_count: int,
         training_hours: float,
     ):
-        machine_cost = self.TRAINING_COSTS.get(machine_type, 0)
-        gpu_cost = self.TRAINING_COSTS.get(accelerator_type, 0) * accelerator_count
+        machine_cost, gpu_cost = self._hourly_rate(self.TRAINING_COSTS, machine_type, accelerator_type, accelerator_count)
         total_hourly = machine_cost + gpu_cost
         total_cost = total_hourly * training_hours
         return {
@@ -45,8 +47,7 @@ class VertexAICostCalculator:
         avg_tokens_per_request: int = 500,
         uptime_hours: int = 730,
     ):
-        machine_cost = self.INFERENCE_COSTS.get(machine_type, 0)
-        gpu_cost = self.INFERENCE_COSTS.get(accelerator_type, 0) * accelerator_count
+        machine_cost, gpu_cost = self._hourly_rate(self.INFERENCE_COSTS, machine_type, accelerator_type, accelerator_count)
         hosting_cost = (machine_cost + gpu_cost) * uptime_hours
         prediction_cost = (requests_per_month * avg_tokens_per_request) / 1_000_000 * 0.50
         return {
@@ -58,4 +59,12 @@ class VertexAICostCalculator:
     def calculate_storage_cost(self, model_size_gb: float, months: int = 1):
         return model_size_gb * self.STORAGE_COST_PER_GB * months
 
-
+    @staticmethod
+    def _hourly_rate(
+        table: Dict[str, float],
+        machine_type: str,
+        accelerator_type: str,
+        accelerator_count: int,
+    ) -> Tuple[float, float]:
+        """(machine, gpu) hourly rates from a price table; unknown types cost 0."""
+        return table.get(machine_type, 0), table.get(accelerator_type, 0) * accelerator_count
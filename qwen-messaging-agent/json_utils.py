@@ -0,0 +1,36 @@
+"""
+JSON helpers for the agent tools and conversation logger.
+
+Encodes and decodes with orjson when it is installed, falling back to the
+stdlib json module otherwise.
+"""
+
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+
+def json_dumps_bytes(obj: Any) -> bytes:
+    """Serialize obj to compact JSON bytes; non-string dict keys are allowed."""
+    if HAS_ORJSON:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def json_dumps(obj: Any) -> str:
+    """Serialize obj to a compact JSON string."""
+    if HAS_ORJSON:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(obj, separators=(",", ":"))
+
+
+def json_loads(data: Union[str, bytes]) -> Any:
+    """Deserialize a JSON document."""
+    if HAS_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -2,6 +2,14 @@ import asyncio
 import aiohttp
 import time
 
+import numpy as np
+
+try:
+    import uvloop
+    HAS_UVLOOP = True
+except ImportError:
+    HAS_UVLOOP = False
+
 
 async def send_request(session, url: str, payload: dict):
     async with session.post(url, json=payload) as response:
@@ -10,37 +18,39 @@ async def send_request(session, url: str, payload: dict):
 
 async def load_test(url: str, num_requests: int, concurrent: int = 10):
     results = {"total": num_requests, "successful": 0, "failed": 0, "latencies": []}
-    async with aiohttp.ClientSession() as session:
-        tasks = []
-        for i in range(num_requests):
+    # Keep `concurrent` requests in flight at all times instead of gathering
+    # fixed-size batches, so one slow response cannot stall the rest.
+    sem = asyncio.Semaphore(concurrent)
+    connector = aiohttp.TCPConnector(limit=concurrent * 2, limit_per_host=concurrent * 2)
+
+    async with aiohttp.ClientSession(connector=connector) as session:
+
+        async def one(i: int):
             payload = {"message": f"Test message {i}", "conversation_id": f"test-{i % concurrent}"}
-            start = time.time()
-            tasks.append(send_request(session, url, payload))
-            if len(tasks) >= concurrent:
-                responses = await asyncio.gather(*tasks)
-                for _body, status in responses:
-                    latency = time.time() - start
-                    results["latencies"].append(latency)
-                    if status == 200:
-                        results["successful"] += 1
-                    else:
-                        results["failed"] += 1
-                tasks = []
-        if tasks:
-            responses = await asyncio.gather(*tasks)
-            for _body, status in responses:
-                if status == 200:
-                    results["successful"] += 1
-                else:
-                    results["failed"] += 1
-    latencies = results["latencies"] or [0]
-    results["avg_latency"] = sum(latencies) / len(latencies)
-    latencies_sorted = sorted(latencies)
-    results["p95_latency"] = latencies_sorted[int(len(latencies_sorted) * 0.95) - 1]
-    results["p99_latency"] = latencies_sorted[int(len(latencies_sorted) * 0.99) - 1]
+            async with sem:
+                start = time.perf_counter()
+                try:
+                    _body, status = await send_request(session, url, payload)
+                except aiohttp.ClientError:
+                    status = None
+                latency = time.perf_counter() - start
+            results["latencies"].append(latency)
+            if status == 200:
+                results["successful"] += 1
+            else:
+                results["failed"] += 1
+
+        async with asyncio.TaskGroup() as tg:
+            for i in range(num_requests):
+                tg.create_task(one(i))
+
+    latencies = np.asarray(results["latencies"] or [0], dtype=np.float64)
+    results["avg_latency"] = float(latencies.mean())
+    results["p95_latency"], results["p99_latency"] = np.percentile(latencies, [95, 99]).tolist()
     return results
 
 
 if __name__ == "__main__":
-    results = asyncio.run(load_test(url="http://localhost:8080/chat", num_requests=100, concurrent=20))
+    with asyncio.Runner(loop_factory=uvloop.new_event_loop if HAS_UVLOOP else None) as runner:
+        results = runner.run(load_test(url="http://localhost:8080/chat", num_requests=100, concurrent=20))
     print(results)
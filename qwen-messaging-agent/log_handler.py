@@ -1,27 +1,73 @@
 from google.cloud import bigquery
-import json
+import atexit
 import datetime
+import queue
+import threading
+import structlog
+
+from json_utils import json_dumps
+
+logger = structlog.get_logger()
 
 
 class ConversationLogger:
+    # Rows are buffered in-process and streamed to BigQuery in batches by a
+    # background thread, so logging never blocks the chat turn.
+    FLUSH_MAX_ROWS = 500
+    FLUSH_INTERVAL_SECONDS = 2.0
+
     def __init__(self, project_id: str, dataset_id: str = "messaging_logs"):
         self.client = bigquery.Client(project=project_id)
         self.dataset_id = dataset_id
         self.table_id = "conversations"
+        self._queue: "queue.Queue[dict]" = queue.Queue()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name="bigquery-log-flusher", daemon=True)
+        self._flusher.start()
+        atexit.register(self.flush)
 
     def log_interaction(self, conversation_id: str, user_message: str, agent_response: str, metadata: dict):
-        rows_to_insert = [
+        # Serialized here so unserializable metadata fails this call alone
+        # and later changes to the caller's dict don't reach the row
+        self._queue.put(
             {
                 "conversation_id": conversation_id,
                 "user_message": user_message,
                 "agent_response": agent_response,
-                "metadata": json.dumps(metadata),
+                "metadata": json_dumps(metadata),
                 "timestamp": datetime.datetime.now().isoformat(),
             }
-        ]
-        table_ref = f"{self.client.project}.{self.dataset_id}.{self.table_id}"
-        errors = self.client.insert_rows_json(table_ref, rows_to_insert)
-        if errors:
-            print(f"Errors inserting rows: {errors}")
+        )
+        if self._queue.qsize() >= self.FLUSH_MAX_ROWS:
+            self._wakeup.set()
+
+    def flush(self):
+        with self._flush_lock:
+            while True:
+                rows_to_insert = []
+                try:
+                    while len(rows_to_insert) < self.FLUSH_MAX_ROWS:
+                        rows_to_insert.append(self._queue.get_nowait())
+                except queue.Empty:
+                    pass
+                if not rows_to_insert:
+                    return
+                self._insert_rows(rows_to_insert)
 
+    def _flush_loop(self):
+        while True:
+            self._wakeup.wait(self.FLUSH_INTERVAL_SECONDS)
+            self._wakeup.clear()
+            self.flush()
 
+    def _insert_rows(self, rows):
+        # Errors are logged, never raised, so a transient BigQuery failure
+        # can't kill the flusher thread
+        try:
+            table_ref = f"{self.client.project}.{self.dataset_id}.{self.table_id}"
+            errors = self.client.insert_rows_json(table_ref, rows)
+            if errors:
+                logger.error("BigQuery insert errors", errors=errors)
+        except Exception as e:
+            logger.error("Failed to log conversations", error=str(e), rows=len(rows))
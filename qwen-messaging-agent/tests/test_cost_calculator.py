@@ -0,0 +1,28 @@
+import unittest
+
+from cost_calculator import VertexAICostCalculator
+
+
+class TestVertexAICostCalculator(unittest.TestCase):
+    def test_training_cost(self):
+        cost = VertexAICostCalculator().calculate_training_cost("n1-standard-8", "NVIDIA_TESLA_T4", 2, 10)
+        self.assertAlmostEqual(cost["hourly_cost"], 0.38 + 0.35 * 2)
+        self.assertAlmostEqual(cost["breakdown"]["gpu"], 7.0)
+
+    def test_unknown_types_cost_nothing(self):
+        cost = VertexAICostCalculator().calculate_monthly_inference_cost("tpu-v9", "NONE", 1, 0)
+        self.assertEqual(cost["total_monthly"], 0)
+
+    def test_price_table_overrides_are_used(self):
+        class Discounted(VertexAICostCalculator):
+            TRAINING_COSTS = {"n1-standard-8": 0.1}
+
+        calculator = VertexAICostCalculator()
+        calculator.INFERENCE_COSTS = {"n1-standard-4": 1.0}
+        self.assertEqual(Discounted().calculate_training_cost("n1-standard-8", "", 0, 1)["total_cost"], 0.1)
+        self.assertEqual(calculator.calculate_monthly_inference_cost("n1-standard-4", "", 0, 0, uptime_hours=2)["hosting_cost"], 2.0)
+        self.assertAlmostEqual(VertexAICostCalculator().calculate_training_cost("n1-standard-8", "", 0, 1)["total_cost"], 0.38)
+
+
+if __name__ == "__main__":
+    unittest.main()
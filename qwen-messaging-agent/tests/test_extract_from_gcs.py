@@ -0,0 +1,52 @@
+import os
+import subprocess
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from trainer import extract_from_gcs
+
+
+class TestExtractFromGcs(unittest.TestCase):
+    def setUp(self):
+        client_patch = patch.object(extract_from_gcs.storage, "Client")
+        self.bucket = client_patch.start().return_value.bucket.return_value
+        self.addCleanup(client_patch.stop)
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.work_dir.cleanup)
+
+        source = os.path.join(self.work_dir.name, "source")
+        os.makedirs(os.path.join(source, "checkpoint-10"))
+        with open(os.path.join(source, "checkpoint-10", "optimizer.pt"), "w") as f:
+            f.write("state")
+        self.archive = os.path.join(self.work_dir.name, "checkpoints.tar.gz")
+        subprocess.run(["tar", "-z", "-cf", self.archive, "-C", source, "checkpoint-10"], check=True)
+
+    def test_extracts_archive_and_removes_download(self):
+        downloads = []
+
+        def download_to_filename(path):
+            downloads.append(path)
+            with open(self.archive, "rb") as src, open(path, "wb") as dst:
+                dst.write(src.read())
+
+        blob = self.bucket.blob.return_value
+        blob.exists.side_effect = lambda: self.bucket.blob.call_args.args[0].endswith(".tar.gz")
+        blob.download_to_filename.side_effect = download_to_filename
+
+        output_dir = os.path.join(self.work_dir.name, "output")
+        extract_from_gcs.extract_from_gcs("bucket", "models", output_dir)
+
+        with open(os.path.join(output_dir, "checkpoint-10", "optimizer.pt")) as f:
+            self.assertEqual(f.read(), "state")
+        self.assertEqual(len(downloads), 1)
+        self.assertFalse(os.path.exists(os.path.dirname(downloads[0])))
+
+    def test_missing_archive_raises(self):
+        self.bucket.blob.return_value.exists.return_value = False
+        with self.assertRaises(FileNotFoundError):
+            extract_from_gcs.extract_from_gcs("bucket", "models", os.path.join(self.work_dir.name, "output"))
+
+
+if __name__ == "__main__":
+    unittest.main()
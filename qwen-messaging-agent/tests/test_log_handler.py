@@ -0,0 +1,62 @@
+import threading
+import unittest
+from unittest.mock import patch
+
+import log_handler
+from log_handler import ConversationLogger
+
+
+class TestConversationLogger(unittest.TestCase):
+    def setUp(self):
+        client_patch = patch.object(log_handler.bigquery, "Client")
+        self.client = client_patch.start().return_value
+        self.client.project = "test-project"
+        self.addCleanup(client_patch.stop)
+
+    def test_failed_insert_does_not_stop_flusher(self):
+        inserted = []
+        second_batch = threading.Event()
+
+        def insert_rows_json(table_ref, rows):
+            if not inserted:
+                inserted.append(None)
+                raise ConnectionError("BigQuery unavailable")
+            inserted.append([row["conversation_id"] for row in rows])
+            second_batch.set()
+            return []
+
+        self.client.insert_rows_json.side_effect = insert_rows_json
+        with patch.object(ConversationLogger, "FLUSH_INTERVAL_SECONDS", 0.01):
+            conversation_logger = ConversationLogger("test-project")
+            conversation_logger.log_interaction("c1", "hi", "hello", {})
+            while not inserted:
+                second_batch.wait(0.01)
+            conversation_logger.log_interaction("c2", "hi", "hello", {})
+            self.assertTrue(second_batch.wait(5))
+
+        self.assertEqual(inserted[1], ["c2"])
+        self.assertTrue(conversation_logger._flusher.is_alive())
+
+    def test_unserializable_metadata_fails_only_that_call(self):
+        self.client.insert_rows_json.return_value = []
+        conversation_logger = ConversationLogger("test-project")
+        with self.assertRaises(TypeError):
+            conversation_logger.log_interaction("c1", "hi", "hello", {"bad": object()})
+        conversation_logger.log_interaction("c2", "hi", "hello", {"ok": 1})
+        conversation_logger.flush()
+        rows = self.client.insert_rows_json.call_args.args[1]
+        self.assertEqual([row["conversation_id"] for row in rows], ["c2"])
+        self.assertEqual(rows[0]["metadata"], '{"ok":1}')
+
+    def test_metadata_captured_when_logged(self):
+        self.client.insert_rows_json.return_value = []
+        conversation_logger = ConversationLogger("test-project")
+        metadata = {"turn": 1}
+        conversation_logger.log_interaction("c1", "hi", "hello", metadata)
+        metadata["turn"] = 2
+        conversation_logger.flush()
+        rows = self.client.insert_rows_json.call_args.args[1]
+        self.assertEqual(rows[0]["metadata"], '{"turn":1}')
+
+if __name__ == "__main__":
+    unittest.main()
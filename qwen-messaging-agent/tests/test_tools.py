@@ -0,0 +1,87 @@
+import json
+import threading
+import unittest
+from unittest.mock import Mock
+from agent.tools import ToolRegistry, ToolCallingAgent, registry
+
+
+class TestToolRegistry(unittest.TestCase):
+    def test_definitions_json_matches_definitions(self):
+        self.assertEqual(json.loads(registry.get_tool_definitions_json()), registry.get_tool_definitions())
+
+    def test_definitions_json_is_cached(self):
+        self.assertIs(registry.get_tool_definitions_json(), registry.get_tool_definitions_json())
+
+    def test_definitions_are_cached(self):
+        self.assertIs(registry.get_tool_definitions(), registry.get_tool_definitions())
+
+    def test_register_invalidates_definitions_json(self):
+        tools = ToolRegistry()
+        before = tools.get_tool_definitions_json()
+
+        @tools.register(name="ping", description="Ping", parameters={"type": "object", "properties": {}})
+        def ping():
+            return "pong"
+
+        after = tools.get_tool_definitions_json()
+        self.assertNotEqual(before, after)
+        self.assertIn('"ping"', after)
+        self.assertEqual([d["function"]["name"] for d in tools.get_tool_definitions()], ["ping"])
+
+
+class TestToolCallingAgent(unittest.TestCase):
+    def setUp(self):
+        self.mock_endpoint = Mock()
+        self.agent = ToolCallingAgent(self.mock_endpoint, registry)
+
+    def test_plain_response(self):
+        self.mock_endpoint.predict.return_value = Mock(predictions=[{"response": "Hello!"}])
+        self.assertEqual(self.agent.chat("Hi", []), "Hello!")
+        self.assertEqual(self.mock_endpoint.predict.call_count, 1)
+
+    def test_tool_call_round_trip(self):
+        tool_call = '<tool_call>{"name": "release_hold", "arguments": {"hold_id": "HOLD_1"}}</tool_call>'
+        self.mock_endpoint.predict.side_effect = [
+            Mock(predictions=[{"response": tool_call}]),
+            Mock(predictions=[{"response": "Released."}]),
+        ]
+        self.assertEqual(self.agent.chat("Release my hold", []), "Released.")
+        messages = self.mock_endpoint.predict.call_args.kwargs["instances"][0]["messages"]
+        self.assertEqual(messages[-1]["role"], "tool")
+        self.assertIn("HOLD_1", messages[-1]["content"])
+
+    def test_streamed_tool_call_dispatched_before_stream_ends(self):
+        tools = ToolRegistry()
+        calls = []
+        called = threading.Event()
+
+        @tools.register(name="ping", description="Ping", parameters={"type": "object", "properties": {}})
+        def ping(target):
+            calls.append(target)
+            called.set()
+            return "pong"
+
+        agent = ToolCallingAgent(self.mock_endpoint, tools, stream=True)
+        seen_before_end = []
+
+        def stream(body, headers):
+            for delta in ['<tool_call>{"name": "ping", ', '"arguments": {"target": "a"}}</tool_', "call>"]:
+                yield f"data: {json.dumps({'response': delta})}".encode()
+            # The tool must run while the stream is still open
+            self.assertTrue(called.wait(5))
+            seen_before_end.extend(calls)
+            yield f"data: {json.dumps({'response': ' Done.'})}".encode()
+            yield b"data: [DONE]"
+
+        self.mock_endpoint.stream_raw_predict.side_effect = stream
+        self.mock_endpoint.predict.return_value = Mock(predictions=[{"response": "Pinged."}])
+
+        self.assertEqual(agent.chat("Ping a", []), "Pinged.")
+        self.assertEqual(seen_before_end, ["a"])
+        self.assertEqual(calls, ["a"])
+        messages = self.mock_endpoint.predict.call_args.kwargs["instances"][0]["messages"]
+        self.assertTrue(messages[-2]["content"].endswith("</tool_call> Done."))
+        self.assertEqual(messages[-1]["content"], "pong")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import asyncio
+import json
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import Mock
+
+# The platform integrations live at the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from agent.tools_with_platforms import ToolRegistry, ToolCallingAgent  # noqa: E402
+
+
+def _tools():
+    tools = ToolRegistry()
+
+    @tools.register(name="ping", description="Ping", parameters={"type": "object", "properties": {}})
+    def ping(target):
+        return f"pong {target}"
+
+    @tools.register(name="aping", description="Async ping", parameters={"type": "object", "properties": {}})
+    async def aping(target):
+        await asyncio.sleep(0)
+        return f"apong {target}"
+
+    return tools
+
+
+def _tool_call(name, target):
+    return "<tool_call>" + json.dumps({"name": name, "arguments": {"target": target}}) + "</tool_call>"
+
+
+class TestToolRegistry(unittest.TestCase):
+    def test_execute_async_awaits_async_tools(self):
+        tools = _tools()
+        self.assertEqual(asyncio.run(tools.execute_async("aping", {"target": "a"})), "apong a")
+        self.assertEqual(asyncio.run(tools.execute_async("ping", {"target": "b"})), "pong b")
+
+    def test_execute_unknown_tool(self):
+        with self.assertRaises(ValueError):
+            _tools().execute("missing", {})
+
+
+class TestToolCallingAgent(unittest.TestCase):
+    def setUp(self):
+        self.endpoint = Mock()
+        self.agent = ToolCallingAgent(self.endpoint, _tools())
+
+    def _respond(self, *responses):
+        self.endpoint.predict.side_effect = [Mock(predictions=[{"response": r}]) for r in responses]
+
+    def _last_tool_message(self):
+        return self.endpoint.predict.call_args.kwargs["instances"][0]["messages"][-1]
+
+    def test_execute_tool_runs_sync_and_async_tools(self):
+        self.assertEqual(self.agent._execute_tool("ping", {"target": "a"}), "pong a")
+        self.assertEqual(self.agent._execute_tool("aping", {"target": "b"}), "apong b")
+
+    def test_sync_chat_plain_and_tool_turns(self):
+        self._respond("Hello!", _tool_call("aping", "a"), "Done.")
+        self.assertEqual(self.agent.chat("Hi", []), "Hello!")
+        self.assertEqual(self.agent.chat("Ping a", []), "Done.")
+        self.assertEqual(self._last_tool_message(), {"role": "tool", "content": "apong a"})
+
+    def test_async_chat_tool_turn(self):
+        self._respond(_tool_call("ping", "b"), "Done.")
+        self.assertEqual(asyncio.run(self.agent.chat_async("Ping b", [])), "Done.")
+        self.assertEqual(self._last_tool_message(), {"role": "tool", "content": "pong b"})
+
+    def test_sync_chat_inside_running_loop(self):
+        self._respond("Hello!", _tool_call("aping", "c"), "Done.")
+
+        async def handler():
+            return self.agent.chat("Hi", []), self.agent.chat("Ping c", [])
+
+        self.assertEqual(asyncio.run(handler()), ("Hello!", "Done."))
+        self.assertEqual(self._last_tool_message(), {"role": "tool", "content": "apong c"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import subprocess
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+
+from trainer import train
+
+
+class TestUploadToGcs(unittest.TestCase):
+    def setUp(self):
+        client_patch = patch.object(train.storage, "Client")
+        self.bucket = client_patch.start().return_value.bucket.return_value
+        self.bucket.blob.side_effect = self._blob
+        self.addCleanup(client_patch.stop)
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.work_dir.cleanup)
+
+        self.model_dir = os.path.join(self.work_dir.name, "model")
+        for relative_path in ("adapter_model.safetensors", "merged/config.json", "checkpoint-10/optimizer.pt"):
+            path = os.path.join(self.model_dir, relative_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write(relative_path)
+
+    @staticmethod
+    def _blob(path):
+        blob = Mock(chunk_size=None)
+        blob.name = path
+        return blob
+
+    def test_checkpoints_uploaded_as_one_archive(self):
+        uploaded = {}
+
+        def upload_many(file_blob_pairs, **kwargs):
+            for local_file, blob in file_blob_pairs:
+                self.assertTrue(os.path.exists(local_file))
+                uploaded[os.path.relpath(blob.name, "models")] = local_file
+
+        with patch.object(train.transfer_manager, "upload_many", side_effect=upload_many):
+            train.upload_to_gcs(self.model_dir, "bucket", "models")
+
+        archive_name = next(name for name in uploaded if name.startswith(train.CHECKPOINT_ARCHIVE))
+        self.assertEqual(
+            sorted(uploaded),
+            sorted([archive_name, "adapter_model.safetensors", os.path.join("merged", "config.json")]),
+        )
+        # The archive's temporary directory is removed once uploaded
+        self.assertFalse(os.path.exists(os.path.dirname(uploaded[archive_name])))
+
+    def test_archive_round_trips(self):
+        archive_dir = os.path.join(self.work_dir.name, "archive")
+        os.makedirs(archive_dir)
+        archive = train.archive_checkpoints(self.model_dir, ["checkpoint-10"], archive_dir)
+        self.assertEqual(os.path.dirname(archive), archive_dir)
+
+        output_dir = os.path.join(self.work_dir.name, "output")
+        os.makedirs(output_dir)
+        decompress = ["-I", "zstd -d"] if archive.endswith(".zst") else ["-z"]
+        subprocess.run(["tar", *decompress, "-xf", archive, "-C", output_dir], check=True)
+        self.assertEqual(os.listdir(output_dir), ["checkpoint-10"])
+
+
+if __name__ == "__main__":
+    unittest.main()
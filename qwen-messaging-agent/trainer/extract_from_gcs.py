@@ -0,0 +1,47 @@
+"""
+Download and unpack the checkpoint archive written by train.py
+"""
+import os
+import argparse
+import subprocess
+import tempfile
+from google.cloud import storage
+
+ARCHIVES = ("checkpoints.tar.zst", "checkpoints.tar.gz")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bucket_name", type=str, required=True)
+    parser.add_argument("--gcs_path", type=str, default="qwen-messaging-agent/models")
+    parser.add_argument("--output_dir", type=str, default="/tmp/output")
+    return parser.parse_args()
+
+
+def extract_from_gcs(bucket_name, gcs_path, output_dir):
+    """Restore checkpoint-* directories under output_dir from Cloud Storage."""
+    bucket = storage.Client().bucket(bucket_name)
+
+    for name in ARCHIVES:
+        blob = bucket.blob(os.path.join(gcs_path, name))
+        if blob.exists():
+            break
+    else:
+        raise FileNotFoundError(f"No checkpoint archive under gs://{bucket_name}/{gcs_path}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    decompress = ["-I", "zstd -d -T0"] if name.endswith(".zst") else ["-z"]
+    with tempfile.TemporaryDirectory() as download_dir:
+        archive = os.path.join(download_dir, name)
+        blob.download_to_filename(archive)
+        subprocess.run(["tar", *decompress, "-xf", archive, "-C", output_dir], check=True)
+    print(f"Extracted gs://{bucket_name}/{blob.name} to {output_dir}")
+
+
+def main():
+    args = parse_args()
+    extract_from_gcs(args.bucket_name, args.gcs_path, args.output_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,19 +4,36 @@ Runs on Vertex AI Custom Training
 """
 import os
 import argparse
+import gc
+import hashlib
+import importlib.util
+import shutil
+import subprocess
+import tempfile
 import torch
 from transformers import (
     AutoModelForCausalLM,
     AutoTokenizer,
     BitsAndBytesConfig,
+    DataCollatorForSeq2Seq,
+    Trainer,
     TrainingArguments,
+    default_data_collator,
 )
-from peft import LoraConfig, get_peft_model, prepare_model_for_kbit_training
-from trl import SFTTrainer, DataCollatorForCompletionOnlyLM
+from peft import LoraConfig, PeftModel, get_peft_model, prepare_model_for_kbit_training
 from datasets import load_dataset
 from google.cloud import storage
+from google.cloud.storage import transfer_manager
 import wandb
 
+LARGE_FILE_BYTES = 100 * 1024 * 1024
+UPLOAD_CHUNK_BYTES = 32 * 1024 * 1024
+DATASET_CACHE_DIR = "/tmp/dataset_cache"
+CHECKPOINT_ARCHIVE = "checkpoints"
+MAX_SEQ_LENGTH = 2048
+RESPONSE_TEMPLATE = "<|im_start|>assistant"
+GRADIENT_CHECKPOINTING_KWARGS = {"use_reentrant": False}
+
 
 def parse_args():
     parser = argparse.ArgumentParser()
@@ -25,12 +42,57 @@ def parse_args():
     parser.add_argument("--bucket_name", type=str, required=True)
     parser.add_argument("--epochs", type=int, default=3)
     parser.add_argument("--batch_size", type=int, default=4)
+    parser.add_argument(
+        "--gradient_accumulation_steps",
+        type=int,
+        default=4,
+        help="Trade for --batch_size at a constant effective batch, e.g. 8x2 or 16x1 when VRAM allows",
+    )
     parser.add_argument("--learning_rate", type=float, default=2e-4)
     parser.add_argument("--dataset_name", type=str, default="OpenAssistant/oasst2")
     parser.add_argument("--wandb_project", type=str, default="qwen-messaging-agent")
+    parser.add_argument(
+        "--packing",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Pack multiple chats into each max_seq_length sequence instead of padding",
+    )
+    parser.add_argument(
+        "--merge_adapters",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Also upload a merged bf16 model (merged/); disable to ship the LoRA adapters only",
+    )
+    parser.add_argument(
+        "--torch_compile",
+        action=argparse.BooleanOptionalAction,
+        default=False,
+        help="Compile the PEFT model with torch.compile (bitsandbytes ops graph-break and run eagerly)",
+    )
+    parser.add_argument(
+        "--torch_compile_mode",
+        type=str,
+        default="reduce-overhead",
+        choices=["default", "reduce-overhead", "max-autotune"],
+    )
     return parser.parse_args()
 
 
+def select_attn_implementation():
+    """Pick the fastest attention kernel for the local GPU architecture."""
+    major, _minor = torch.cuda.get_device_capability()
+    if major < 9:
+        return "flash_attention_2"
+
+    # Hopper: FlashAttention-3 (warp-specialized WGMMA/TMA) when installed,
+    # otherwise SDPA, which dispatches to cuDNN's fused attention on SM90.
+    if importlib.util.find_spec("flash_attn_interface") is not None:
+        return "flash_attention_3"
+    torch.backends.cuda.enable_cudnn_sdp(True)
+    torch.backends.cuda.enable_flash_sdp(True)
+    return "sdpa"
+
+
 def setup_model_and_tokenizer(model_name):
     """Load model with 4-bit quantization."""
     bnb_config = BitsAndBytesConfig(
@@ -38,14 +100,20 @@ def setup_model_and_tokenizer(model_name):
         bnb_4bit_quant_type="nf4",
         bnb_4bit_compute_dtype=torch.bfloat16,
         bnb_4bit_use_double_quant=True,
+        # Pack NF4 weights in bf16 containers to match the compute dtype
+        bnb_4bit_quant_storage=torch.bfloat16,
     )
 
+    # One full replica per process: under torchrun the Trainer wraps the model
+    # in DistributedDataParallel, which beats device_map="auto" layer sharding.
+    local_rank = int(os.environ.get("LOCAL_RANK", 0))
+
     model = AutoModelForCausalLM.from_pretrained(
         model_name,
         quantization_config=bnb_config,
-        device_map="auto",
+        device_map={"": local_rank},
         trust_remote_code=True,
-        attn_implementation="flash_attention_2",
+        attn_implementation=select_attn_implementation(),
     )
 
     tokenizer = AutoTokenizer.from_pretrained(
@@ -61,9 +129,24 @@ def setup_model_and_tokenizer(model_name):
     return model, tokenizer
 
 
-def prepare_dataset(dataset_name, tokenizer):
-    """Load and format dataset for supervised fine-tuning."""
+def mask_prompt_tokens(input_ids, response_ids):
+    """Labels that train only on the final assistant turn (-100 elsewhere)."""
+    n = len(response_ids)
+    for start in range(len(input_ids) - n, -1, -1):
+        if input_ids[start:start + n] == response_ids:
+            return [-100] * (start + n) + input_ids[start + n:]
+    # Response template truncated away: nothing to learn from this example
+    return [-100] * len(input_ids)
+
+
+def prepare_dataset(dataset_name, tokenizer, packing, max_seq_length=MAX_SEQ_LENGTH):
+    """Load, tokenize and label dataset for supervised fine-tuning.
+
+    Tokenizing and masking happen once here (cached on disk), so batches are
+    only padded or stacked at training time.
+    """
     dataset = load_dataset(dataset_name, split="train[:10000]")  # Sample for demo
+    response_ids = tokenizer.encode(RESPONSE_TEMPLATE, add_special_tokens=False)
 
     def format_chat(example):
         # Convert to Qwen3 chat format
@@ -80,17 +163,70 @@ def prepare_dataset(dataset_name, tokenizer):
             tokenize=False,
             add_generation_prompt=False,
         )
-        return {"text": text}
-
-    formatted_dataset = dataset.map(
+        input_ids = tokenizer(
+            text,
+            add_special_tokens=False,
+            truncation=not packing,
+            max_length=max_seq_length,
+        )["input_ids"]
+        if packing:
+            # EOS separates chats once they are concatenated into blocks
+            input_ids.append(tokenizer.eos_token_id)
+        return {
+            "input_ids": input_ids,
+            "attention_mask": [1] * len(input_ids),
+            "labels": mask_prompt_tokens(input_ids, response_ids),
+        }
+
+    def group_blocks(batch):
+        # Concatenate chats and cut full max_seq_length blocks, keeping each
+        # token's label so completion-only loss survives packing
+        blocks = {}
+        for key in ("input_ids", "attention_mask", "labels"):
+            flat = [token for seq in batch[key] for token in seq]
+            usable = len(flat) // max_seq_length * max_seq_length
+            blocks[key] = [flat[i:i + max_seq_length] for i in range(0, usable, max_seq_length)]
+        return blocks
+
+    # The chat template and tokenizer run across all cores, and the result is
+    # kept as a memory-mapped Arrow file that later runs load directly.
+    cache_key = hashlib.sha256(
+        f"{dataset_name}:{tokenizer.name_or_path}:{packing}:{max_seq_length}".encode()
+    ).hexdigest()[:16]
+    os.makedirs(DATASET_CACHE_DIR, exist_ok=True)
+    tokenized_dataset = dataset.map(
         format_chat,
         remove_columns=dataset.column_names,
+        num_proc=os.cpu_count(),
+        load_from_cache_file=True,
+        cache_file_name=os.path.join(DATASET_CACHE_DIR, f"chat_{cache_key}.arrow"),
     )
 
-    split_dataset = formatted_dataset.train_test_split(test_size=0.05, seed=42)
+    split_dataset = tokenized_dataset.train_test_split(test_size=0.05, seed=42)
+    if packing:
+        split_dataset = split_dataset.map(group_blocks, batched=True, num_proc=os.cpu_count())
     return split_dataset["train"], split_dataset["test"]
 
 
+def merge_adapters(model_name, adapter_dir, merged_output):
+    """Merge saved LoRA adapters into a bf16 base model on the CPU.
+
+    The base is reloaded unquantized in host memory, so the merge never
+    competes with training state for VRAM and the merged weights are not
+    folded into dequantized NF4 approximations.
+    """
+    base_model = AutoModelForCausalLM.from_pretrained(
+        model_name,
+        torch_dtype=torch.bfloat16,
+        device_map="cpu",
+        low_cpu_mem_usage=True,
+        trust_remote_code=True,
+    )
+    merged_model = PeftModel.from_pretrained(base_model, adapter_dir).merge_and_unload()
+    os.makedirs(merged_output, exist_ok=True)
+    merged_model.save_pretrained(merged_output, safe_serialization=True)
+
+
 def setup_lora_config():
     """Configure LoRA for parameter-efficient fine-tuning."""
     return LoraConfig(
@@ -111,37 +247,92 @@ def setup_lora_config():
     )
 
 
-def upload_to_gcs(local_path, bucket_name, gcs_path):
-    """Upload trained model directory to Cloud Storage recursively."""
+def archive_checkpoints(local_path, checkpoint_dirs, archive_dir):
+    """Bundle Trainer checkpoint-* directories into a single tarball in archive_dir.
+
+    Checkpoints are many small files (optimizer, scheduler and RNG state per
+    save step) that nothing reads per object, so they ship as one stream.
+    Uses multi-threaded zstd when available, gzip otherwise.
+    """
+    if shutil.which("zstd"):
+        archive = os.path.join(archive_dir, f"{CHECKPOINT_ARCHIVE}.tar.zst")
+        compress = ["-I", "zstd -T0 -3"]
+    else:
+        archive = os.path.join(archive_dir, f"{CHECKPOINT_ARCHIVE}.tar.gz")
+        compress = ["-z"]
+    subprocess.run(
+        ["tar", *compress, "-cf", archive, "-C", local_path, *sorted(checkpoint_dirs)],
+        check=True,
+    )
+    return archive
+
+
+def upload_to_gcs(local_path, bucket_name, gcs_path, max_workers=16):
+    """Upload trained model directory to Cloud Storage recursively.
+
+    The adapter, tokenizer and merged/ model stay individual objects because
+    deployment reads them in place; checkpoint-* directories are uploaded as
+    one archive (see extract_from_gcs.py).
+    """
     client = storage.Client()
     bucket = client.bucket(bucket_name)
 
-    for root, _dirs, files in os.walk(local_path):
-        for file in files:
-            local_file = os.path.join(root, file)
-            relative_path = os.path.relpath(local_file, local_path)
-            blob_path = os.path.join(gcs_path, relative_path)
-
+    uploads = []
+    checkpoint_dirs = [
+        name for name in os.listdir(local_path)
+        if name.startswith("checkpoint-") and os.path.isdir(os.path.join(local_path, name))
+    ]
+    with tempfile.TemporaryDirectory() as archive_dir:
+        if checkpoint_dirs:
+            archive = archive_checkpoints(local_path, checkpoint_dirs, archive_dir)
+            uploads.append((archive, os.path.join(gcs_path, os.path.basename(archive))))
+
+        for root, dirs, files in os.walk(local_path):
+            if root == local_path:
+                dirs[:] = [d for d in dirs if d not in checkpoint_dirs]
+            for file in files:
+                local_file = os.path.join(root, file)
+                relative_path = os.path.relpath(local_file, local_path)
+                uploads.append((local_file, os.path.join(gcs_path, relative_path)))
+
+        file_blob_pairs = []
+        for local_file, blob_path in uploads:
             blob = bucket.blob(blob_path)
-            blob.upload_from_filename(local_file)
-            print(f"Uploaded {local_file} to gs://{bucket_name}/{blob_path}")
+            if os.path.getsize(local_file) > LARGE_FILE_BYTES:
+                # Weight shards go up as resumable uploads in large chunks
+                blob.chunk_size = UPLOAD_CHUNK_BYTES
+            file_blob_pairs.append((local_file, blob))
+
+        # transfer_manager overlaps the uploads on worker threads that share the
+        # client's pooled connections, instead of one round-trip at a time.
+        transfer_manager.upload_many(
+            file_blob_pairs,
+            max_workers=max_workers,
+            worker_type=transfer_manager.THREAD,
+            raise_exception=True,
+        )
+        for local_file, blob in file_blob_pairs:
+            print(f"Uploaded {local_file} to gs://{bucket_name}/{blob.name}")
 
 
 def main():
     args = parse_args()
 
-    # Initialize Weights & Biases
-    wandb.init(project=args.wandb_project, config=vars(args))
+    # Initialize Weights & Biases once per job: under torchrun every rank runs
+    # this script, but only global rank 0 reports
+    is_main_process = int(os.environ.get("RANK", 0)) == 0
+    if is_main_process:
+        wandb.init(project=args.wandb_project, config=vars(args))
 
     print("Loading model and tokenizer...")
     model, tokenizer = setup_model_and_tokenizer(args.model_name)
 
-    print("Preparing dataset...")
-    train_dataset, eval_dataset = prepare_dataset(args.dataset_name, tokenizer)
-
     print("Setting up LoRA...")
     lora_config = setup_lora_config()
-    model = prepare_model_for_kbit_training(model)
+    model = prepare_model_for_kbit_training(
+        model,
+        gradient_checkpointing_kwargs=GRADIENT_CHECKPOINTING_KWARGS,
+    )
     model = get_peft_model(model, lora_config)
     model.print_trainable_parameters()
 
@@ -151,9 +342,14 @@ def main():
         num_train_epochs=args.epochs,
         per_device_train_batch_size=args.batch_size,
         per_device_eval_batch_size=args.batch_size,
-        gradient_accumulation_steps=4,
+        gradient_accumulation_steps=args.gradient_accumulation_steps,
         gradient_checkpointing=True,
-        optim="paged_adamw_32bit",
+        # Non-reentrant checkpointing skips the extra graph re-trace and
+        # composes with torch.compile and DDP
+        gradient_checkpointing_kwargs=GRADIENT_CHECKPOINTING_KWARGS,
+        # Only the LoRA adapters carry optimizer state, which fits in VRAM as
+        # blockwise 8-bit moments without paging to host memory.
+        optim="adamw_bnb_8bit",
         learning_rate=args.learning_rate,
         lr_scheduler_type="cosine",
         warmup_ratio=0.03,
@@ -161,33 +357,53 @@ def main():
         fp16=False,
         bf16=True,
         max_grad_norm=0.3,
-        logging_steps=10,
+        logging_steps=50,
         save_strategy="steps",
         save_steps=100,
         evaluation_strategy="steps",
         eval_steps=100,
-        report_to="wandb",
+        report_to=["wandb"] if is_main_process else [],
         load_best_model_at_end=True,
+        # Collate and pin batches in worker processes while the GPU steps
+        dataloader_num_workers=4,
+        dataloader_pin_memory=True,
+        # Only LoRA adapters are trainable, so every parameter gets a gradient
+        ddp_find_unused_parameters=False,
+        ddp_bucket_cap_mb=25,
+        # The Trainer compiles the (DDP-wrapped) model itself, fusing norms,
+        # activations and the LoRA A/B matmuls around the quantized linears
+        torch_compile=args.torch_compile,
+        torch_compile_mode=args.torch_compile_mode if args.torch_compile else None,
     )
 
-    # Data collator - focus loss on assistant completions
-    response_template = "<|im_start|>assistant"
-    collator = DataCollatorForCompletionOnlyLM(
-        response_template=response_template,
-        tokenizer=tokenizer,
-    )
+    # Rank 0 builds the Arrow cache; the other ranks then load it instead of
+    # tokenizing the same rows again.
+    print("Preparing dataset...")
+    with training_args.main_process_first(desc="dataset tokenization"):
+        train_dataset, eval_dataset = prepare_dataset(args.dataset_name, tokenizer, args.packing)
+
+    # Packing concatenates short chats (EOS-separated) into full-length
+    # blocks so no compute is spent on padding; every block is the same
+    # length and can be stacked as-is. Unpacked chats are padded per batch,
+    # with -100 labels on the padding.
+    if args.packing:
+        collator = default_data_collator
+    else:
+        collator = DataCollatorForSeq2Seq(
+            tokenizer,
+            padding=True,
+            pad_to_multiple_of=8,
+            label_pad_token_id=-100,
+        )
 
-    # Initialize trainer
-    trainer = SFTTrainer(
+    # Initialize trainer - the dataset is already tokenized and labelled
+    trainer = Trainer(
         model=model,
         args=training_args,
         train_dataset=train_dataset,
         eval_dataset=eval_dataset,
         tokenizer=tokenizer,
         data_collator=collator,
-        max_seq_length=2048,
-        packing=False,
-        dataset_text_field="text",
     )
 
     print("Starting training...")
@@ -195,14 +411,24 @@ def main():
 
     print("Saving final model...")
     trainer.save_model(args.output_dir)
+
+    if not trainer.is_world_process_zero():
+        return
+
     tokenizer.save_pretrained(args.output_dir)
 
-    # Save merged model for standalone inference
-    merged_model = model.merge_and_unload()
-    merged_output = os.path.join(args.output_dir, "merged")
-    os.makedirs(merged_output, exist_ok=True)
-    merged_model.save_pretrained(merged_output)
-    tokenizer.save_pretrained(merged_output)
+    if args.merge_adapters:
+        # Drop the quantized training model, optimizer state and cached
+        # activations before materializing a full-precision copy
+        del trainer, model
+        gc.collect()
+        torch.cuda.empty_cache()
+
+        # Save merged model for standalone inference
+        print("Merging LoRA adapters...")
+        merged_output = os.path.join(args.output_dir, "merged")
+        merge_adapters(args.model_name, args.output_dir, merged_output)
+        tokenizer.save_pretrained(merged_output)
 
     # Upload to GCS
     print("Uploading to Cloud Storage...")
@@ -3,14 +3,17 @@ Circuit Breaker Pattern Implementation
 Prevents cascading failures and enables graceful degradation
 """
 
+import asyncio
 import time
 import threading
+import weakref
+from collections import deque
 from enum import Enum
 from typing import Callable, Optional, Any, Dict
 from functools import wraps
 from datetime import datetime, timedelta
 import structlog
-from collections import deque
+from array import array
 
 logger = structlog.get_logger()
 
@@ -27,6 +30,11 @@ class CircuitBreakerError(Exception):
     pass
 
 
+class _StripeOwner:
+    """Held in one thread's local storage; collected when that thread exits."""
+    __slots__ = ("__weakref__",)
+
+
 class CircuitBreaker:
     """
     Circuit breaker implementation with configurable thresholds.
@@ -71,18 +79,29 @@ class CircuitBreaker:
         self._last_failure_time = None
         self._opened_at = None
         
-        # Statistics
-        self._total_requests = 0
+        # Statistics. Request/success counts are striped per thread so the
+        # CLOSED fast path can count without taking the lock; get_stats sums
+        # the stripes. Stripes of exited threads are queued in _dead_stripes
+        # and folded into _retired_counts, so they don't pile up.
+        self._local = threading.local()
+        self._counter_stripes: Dict[int, list] = {}
+        self._dead_stripes = deque()
+        self._retired_counts = [0, 0]
         self._total_failures = 0
-        self._total_successes = 0
         self._total_timeouts = 0
         self._total_rejections = 0
         
-        # Recent failures for monitoring
-        self._recent_failures = deque(maxlen=100)
+        # Recent failures for monitoring: a preallocated ring buffer of raw
+        # fields, formatted only when get_stats is called
+        self._rf_size = 100
+        self._rf_ts = array('d', [0.0]) * self._rf_size
+        self._rf_type = [None] * self._rf_size
+        self._rf_msg = [None] * self._rf_size
+        self._rf_idx = 0
+        self._rf_count = 0
         
-        # Thread safety
-        self._lock = threading.RLock()
+        # Thread safety - only taken on state transitions and failure paths
+        self._lock = threading.Lock()
         
         logger.info("Circuit breaker initialized",
                    name=name,
@@ -96,6 +115,28 @@ class CircuitBreaker:
             self._check_and_update_state()
             return self._state
     
+    def _counters(self) -> list:
+        """Get this thread's [requests, successes] counter stripe."""
+        counters = getattr(self._local, "counters", None)
+        if counters is None:
+            counters = self._local.counters = [0, 0]
+            # The finalizer may run on any thread, even one holding the lock,
+            # so it only queues the stripe; reaping happens under the lock
+            self._local.owner = owner = _StripeOwner()
+            weakref.finalize(owner, self._dead_stripes.append, counters)
+            with self._lock:
+                self._reap_stripes()
+                self._counter_stripes[id(counters)] = counters
+        return counters
+    
+    def _reap_stripes(self):
+        """Fold the stripes of exited threads into the retired totals."""
+        while self._dead_stripes:
+            counters = self._dead_stripes.popleft()
+            del self._counter_stripes[id(counters)]
+            self._retired_counts[0] += counters[0]
+            self._retired_counts[1] += counters[1]
+    
     def _check_and_update_state(self):
         """Check if state should transition."""
         if self._state == CircuitState.OPEN:
@@ -150,24 +191,7 @@ class CircuitBreaker:
         Raises:
             CircuitBreakerError: If circuit is open
         """
-        with self._lock:
-            self._total_requests += 1
-            current_state = self.state
-            
-            # Reject if circuit is open
-            if current_state == CircuitState.OPEN:
-                self._total_rejections += 1
-                logger.warning("Request rejected - circuit open",
-                             name=self.name,
-                             state=current_state.value)
-                raise CircuitBreakerError(
-                    f"Circuit breaker '{self.name}' is OPEN"
-                )
-            
-            # Allow limited requests in half-open
-            if current_state == CircuitState.HALF_OPEN:
-                logger.debug("Request allowed in half-open state",
-                           name=self.name)
+        counters = self._admit()
         
         # Execute function
         start_time = time.time()
@@ -182,18 +206,83 @@ class CircuitBreaker:
                     f"Request exceeded timeout: {duration:.2f}s > {self.timeout}s"
                 )
             
-            self._on_success()
+            self._on_success(counters)
+            return result
+            
+        except self.expected_exception as e:
+            self._on_failure(e)
+            raise
+    
+    async def call_async(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Await coroutine function with circuit breaker protection.
+        
+        Runs on the caller's event loop; the timeout cancels the coroutine
+        instead of measuring it after it finishes.
+        
+        Raises:
+            CircuitBreakerError: If circuit is open
+        """
+        counters = self._admit()
+        
+        start_time = time.perf_counter()
+        try:
+            if self.timeout:
+                try:
+                    result = await asyncio.wait_for(func(*args, **kwargs), timeout=self.timeout)
+                except asyncio.TimeoutError:
+                    duration = time.perf_counter() - start_time
+                    self._on_timeout(duration)
+                    raise TimeoutError(
+                        f"Request exceeded timeout: {duration:.2f}s > {self.timeout}s"
+                    )
+            else:
+                result = await func(*args, **kwargs)
+            
+            self._on_success(counters)
             return result
             
         except self.expected_exception as e:
             self._on_failure(e)
             raise
     
-    def _on_success(self):
+    def _admit(self) -> list:
+        """Count a request and reject it if the circuit is open."""
+        counters = self._counters()
+        counters[0] += 1
+        
+        # CLOSED needs no transition check, so skip the lock entirely
+        if self._state is not CircuitState.CLOSED:
+            with self._lock:
+                self._check_and_update_state()
+                current_state = self._state
+                
+                # Reject if circuit is open
+                if current_state == CircuitState.OPEN:
+                    self._total_rejections += 1
+                    logger.warning("Request rejected - circuit open",
+                                 name=self.name,
+                                 state=current_state.value)
+                    raise CircuitBreakerError(
+                        f"Circuit breaker '{self.name}' is OPEN"
+                    )
+                
+                # Allow limited requests in half-open
+                if current_state == CircuitState.HALF_OPEN:
+                    logger.debug("Request allowed in half-open state",
+                               name=self.name)
+        
+        return counters
+    
+    def _on_success(self, counters: list):
         """Handle successful request."""
+        counters[1] += 1
+        
+        # Steady state: CLOSED with no failure streak to reset
+        if self._state is CircuitState.CLOSED and self._failure_count == 0:
+            return
+        
         with self._lock:
-            self._total_successes += 1
-            
             if self._state == CircuitState.HALF_OPEN:
                 self._success_count += 1
                 
@@ -212,16 +301,19 @@ class CircuitBreaker:
             self._last_failure_time = time.time()
             
             # Record failure details
-            self._recent_failures.append({
-                "timestamp": datetime.utcnow().isoformat(),
-                "exception": str(exception),
-                "type": type(exception).__name__
-            })
+            message = str(exception)
+            idx = self._rf_idx
+            self._rf_ts[idx] = self._last_failure_time
+            self._rf_type[idx] = type(exception).__name__
+            self._rf_msg[idx] = message
+            self._rf_idx = (idx + 1) % self._rf_size
+            if self._rf_count < self._rf_size:
+                self._rf_count += 1
             
             logger.warning("Circuit breaker failure recorded",
                          name=self.name,
                          failure_count=self._failure_count,
-                         exception=str(exception))
+                         exception=message)
             
             # Transition based on state
             if self._state == CircuitState.HALF_OPEN:
@@ -242,22 +334,39 @@ class CircuitBreaker:
                          duration=duration,
                          timeout=self.timeout)
     
+    def _recent_failures(self, limit: int) -> list:
+        """Format the newest `limit` failures, oldest first."""
+        count = min(limit, self._rf_count)
+        failures = []
+        for offset in range(count, 0, -1):
+            idx = (self._rf_idx - offset) % self._rf_size
+            failures.append({
+                "timestamp": datetime.utcfromtimestamp(self._rf_ts[idx]).isoformat(),
+                "exception": self._rf_msg[idx],
+                "type": self._rf_type[idx]
+            })
+        return failures
+    
     def get_stats(self) -> Dict[str, Any]:
         """Get circuit breaker statistics."""
         with self._lock:
+            self._reap_stripes()
+            stripes = self._counter_stripes.values()
+            total_requests = self._retired_counts[0] + sum(stripe[0] for stripe in stripes)
+            total_successes = self._retired_counts[1] + sum(stripe[1] for stripe in stripes)
             return {
                 "name": self.name,
                 "state": self._state.value,
-                "total_requests": self._total_requests,
-                "total_successes": self._total_successes,
+                "total_requests": total_requests,
+                "total_successes": total_successes,
                 "total_failures": self._total_failures,
                 "total_timeouts": self._total_timeouts,
                 "total_rejections": self._total_rejections,
                 "failure_count": self._failure_count,
                 "success_count": self._success_count,
                 "success_rate": (
-                    self._total_successes / self._total_requests
-                    if self._total_requests > 0 else 0
+                    total_successes / total_requests
+                    if total_requests > 0 else 0
                 ),
                 "opened_at": (
                     datetime.fromtimestamp(self._opened_at).isoformat()
@@ -267,7 +376,7 @@ class CircuitBreaker:
                     datetime.fromtimestamp(self._last_failure_time).isoformat()
                     if self._last_failure_time else None
                 ),
-                "recent_failures": list(self._recent_failures)[-10:]  # Last 10
+                "recent_failures": self._recent_failures(10)
             }
     
     def reset(self):
@@ -284,14 +393,8 @@ class CircuitBreaker:
         
         @wraps(func)
         async def async_wrapper(*args, **kwargs):
-            # For async functions, wrap the call
-            import asyncio
-            loop = asyncio.get_event_loop()
-            return await loop.run_in_executor(
-                None, self.call, func, *args, **kwargs
-            )
+            return await self.call_async(func, *args, **kwargs)
         
-        import asyncio
         return async_wrapper if asyncio.iscoroutinefunction(func) else wrapper
 
 
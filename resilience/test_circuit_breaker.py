@@ -0,0 +1,180 @@
+"""
+Test Suite for the Circuit Breaker
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from resilience.circuit_breaker import CircuitBreaker, CircuitBreakerError, CircuitState
+
+
+def _fail(message: str):
+    raise ValueError(message)
+
+
+class TestCounterStripes:
+    """Tests for the per-thread request/success counters"""
+    
+    def test_counts_summed_across_threads(self):
+        """Every thread's requests and successes show up in get_stats"""
+        breaker = CircuitBreaker("stripes")
+        barrier = threading.Barrier(8)
+        
+        def work():
+            barrier.wait()
+            for _ in range(100):
+                breaker.call(lambda: None)
+        
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        stats = breaker.get_stats()
+        assert stats["total_requests"] == 800
+        assert stats["total_successes"] == 800
+        assert stats["success_rate"] == 1
+    
+    def test_exited_thread_stripes_are_reclaimed(self):
+        """Thread churn does not grow the stripes, and no counts are lost"""
+        breaker = CircuitBreaker("churn")
+        breaker.call(lambda: None)
+        
+        for _ in range(50):
+            thread = threading.Thread(target=breaker.call, args=(lambda: None,))
+            thread.start()
+            thread.join()
+        
+        stats = breaker.get_stats()
+        assert stats["total_requests"] == 51
+        assert stats["total_successes"] == 51
+        # Only this thread's stripe is still live
+        assert len(breaker._counter_stripes) == 1
+    
+    def test_failures_count_as_requests(self):
+        """A failed call is a request but not a success"""
+        breaker = CircuitBreaker("failures", failure_threshold=10)
+        breaker.call(lambda: None)
+        with pytest.raises(ValueError):
+            breaker.call(_fail, "boom")
+        
+        stats = breaker.get_stats()
+        assert (stats["total_requests"], stats["total_successes"], stats["total_failures"]) == (2, 1, 1)
+        assert stats["success_rate"] == 0.5
+
+
+class TestRecentFailures:
+    """Tests for the recent failures ring buffer"""
+    
+    def test_newest_ten_oldest_first(self):
+        """get_stats reports the last ten failures in order"""
+        breaker = CircuitBreaker("recent", failure_threshold=1000)
+        for i in range(15):
+            with pytest.raises(ValueError):
+                breaker.call(_fail, f"failure {i}")
+        
+        recent = breaker.get_stats()["recent_failures"]
+        assert [f["exception"] for f in recent] == [f"failure {i}" for i in range(5, 15)]
+        assert {f["type"] for f in recent} == {"ValueError"}
+    
+    def test_buffer_wraps(self):
+        """Past the buffer size the oldest entries are overwritten"""
+        breaker = CircuitBreaker("wrap", failure_threshold=1000)
+        for i in range(breaker._rf_size + 3):
+            with pytest.raises(ValueError):
+                breaker.call(_fail, f"failure {i}")
+        
+        recent = breaker._recent_failures(breaker._rf_size)
+        assert len(recent) == breaker._rf_size
+        assert recent[0]["exception"] == "failure 3"
+        assert recent[-1]["exception"] == f"failure {breaker._rf_size + 2}"
+    
+    def test_fewer_than_limit(self):
+        """With few failures only those are reported"""
+        breaker = CircuitBreaker("few", failure_threshold=1000)
+        with pytest.raises(ValueError):
+            breaker.call(_fail, "only")
+        assert [f["exception"] for f in breaker.get_stats()["recent_failures"]] == ["only"]
+
+
+class TestStateTransitions:
+    """Tests for opening and rejecting"""
+    
+    def test_opens_and_rejects(self):
+        """Reaching the failure threshold opens the circuit"""
+        breaker = CircuitBreaker("open", failure_threshold=2, recovery_timeout=60)
+        for _ in range(2):
+            with pytest.raises(ValueError):
+                breaker.call(_fail, "boom")
+        
+        assert breaker.state is CircuitState.OPEN
+        with pytest.raises(CircuitBreakerError):
+            breaker.call(lambda: None)
+        assert breaker.get_stats()["total_rejections"] == 1
+
+
+class TestCallAsync:
+    """Tests for CircuitBreaker.call_async"""
+    
+    def test_success_counted(self):
+        """An awaited success returns its result and is counted"""
+        breaker = CircuitBreaker("async-success")
+        
+        async def ok():
+            return "done"
+        
+        assert asyncio.run(breaker.call_async(ok)) == "done"
+        stats = breaker.get_stats()
+        assert (stats["total_requests"], stats["total_successes"]) == (1, 1)
+    
+    def test_failure_opens_circuit(self):
+        """Awaited failures count toward opening the circuit"""
+        breaker = CircuitBreaker("async-failure", failure_threshold=2)
+        
+        async def fail():
+            raise ValueError("boom")
+        
+        async def run():
+            for _ in range(2):
+                with pytest.raises(ValueError):
+                    await breaker.call_async(fail)
+        
+        asyncio.run(run())
+        assert breaker.state is CircuitState.OPEN
+        assert breaker.get_stats()["total_failures"] == 2
+    
+    def test_timeout_cancels_slow_coroutine(self):
+        """A coroutine past the timeout is cancelled and TimeoutError raised"""
+        breaker = CircuitBreaker("async-timeout", timeout=0.01)
+        cancelled = []
+        
+        async def slow():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+        
+        with pytest.raises(TimeoutError):
+            asyncio.run(breaker.call_async(slow))
+        assert cancelled == [True]
+        stats = breaker.get_stats()
+        assert (stats["total_timeouts"], stats["total_failures"], stats["total_successes"]) == (1, 1, 0)
+    
+    def test_open_circuit_rejects_without_awaiting(self):
+        """An open circuit raises before the coroutine function is called"""
+        breaker = CircuitBreaker("async-open", failure_threshold=1, recovery_timeout=60)
+        with pytest.raises(ValueError):
+            breaker.call(_fail, "boom")
+        calls = []
+        
+        async def ok():
+            calls.append(True)
+        
+        with pytest.raises(CircuitBreakerError):
+            asyncio.run(breaker.call_async(ok))
+        assert calls == []
+        assert breaker.get_stats()["total_rejections"] == 1
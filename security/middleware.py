@@ -5,6 +5,8 @@ Security headers middleware for FastAPI
 from fastapi import Request, Response
 from fastapi.responses import JSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
+from typing import Callable
+import os
 import time
 
 
@@ -14,13 +16,9 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
     def __init__(self, app, strict_mode: bool = True):
         super().__init__(app)
         self.strict_mode = strict_mode
-    
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        """Add security headers to response."""
-        response = await call_next(request)
         
-        # Security headers
-        security_headers = {
+        # Headers are static for a given strict_mode, so build them once
+        self.security_headers = {
             # Prevent XSS attacks
             "X-Content-Type-Options": "nosniff",
             "X-Frame-Options": "DENY",
@@ -38,11 +36,11 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
             # Permissions policy
             "Permissions-Policy": "geolocation=(), microphone=(), camera=()",
         }
-        
-        # Add headers to response
-        for header, value in security_headers.items():
-            response.headers[header] = value
-        
+    
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        """Add security headers to response."""
+        response = await call_next(request)
+        response.headers.update(self.security_headers)
         return response
     
     def _get_csp(self) -> str:
@@ -77,7 +75,11 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
     def __init__(self, app, requests_per_minute: int = 60):
         super().__init__(app)
         self.requests_per_minute = requests_per_minute
-        self.request_counts = {}
+        # Two minute-buckets (current and previous), indexed by minute parity.
+        # A slot is cleared when its minute rolls over, so there is no
+        # per-request scan and memory stays bounded by the active client IPs.
+        self._buckets = [{}, {}]
+        self._bucket_minute = [-1, -1]
     
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
         """Check rate limits."""
@@ -85,54 +87,101 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         
         # Simple in-memory rate limiting (use Redis in production)
         current_time = int(time.time() / 60)  # Minute-based buckets
-        key = f"{client_ip}:{current_time}"
+        slot = current_time % 2
         
-        if key not in self.request_counts:
-            self.request_counts[key] = 0
+        if self._bucket_minute[slot] != current_time:
+            self._buckets[slot] = {}
+            self._bucket_minute[slot] = current_time
         
-        self.request_counts[key] += 1
+        counts = self._buckets[slot]
+        count = counts.get(client_ip, 0) + 1
+        counts[client_ip] = count
         
-        if self.request_counts[key] > self.requests_per_minute:
+        if count > self.requests_per_minute:
             return JSONResponse(
                 status_code=429,
                 content={"detail": "Rate limit exceeded"}
             )
         
-        # Clean old entries
-        self._cleanup_old_entries(current_time)
-        
         response = await call_next(request)
         return response
-    
-    def _cleanup_old_entries(self, current_time: int):
-        """Remove old rate limit entries."""
-        keys_to_remove = [
-            key for key in self.request_counts.keys()
-            if int(key.split(':')[1]) < current_time - 1
-        ]
-        for key in keys_to_remove:
-            del self.request_counts[key]
 
 
-class RequestSizeMiddleware(BaseHTTPMiddleware):
-    """Limit request size to prevent DoS attacks."""
+class RequestSizeMiddleware:
+    """
+    Limit request size to prevent DoS attacks.
+    
+    Plain ASGI middleware so the body stream itself can be metered:
+    a declared Content-Length is rejected up front, and chunked or
+    mislabelled uploads are cut off once they pass max_size.
+    """
     
     def __init__(self, app, max_size: int = 10 * 1024 * 1024):  # 10MB default
-        super().__init__(app)
+        self.app = app
         self.max_size = max_size
+        self._too_large_body = JSONResponse(
+            status_code=413,
+            content={"detail": "Request too large"}
+        ).body
     
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+    def _too_large(self) -> Response:
+        # Responses are single-use; reuse the pre-rendered body bytes
+        return Response(
+            content=self._too_large_body,
+            status_code=413,
+            media_type="application/json"
+        )
+    
+    async def __call__(self, scope, receive, send):
         """Check request size."""
-        content_length = request.headers.get("content-length")
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
         
-        if content_length and int(content_length) > self.max_size:
-            return JSONResponse(
-                status_code=413,
-                content={"detail": "Request too large"}
-            )
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                if value.isdigit() and int(value) > self.max_size:
+                    await self._too_large()(scope, receive, send)
+                    return
+                break
         
-        response = await call_next(request)
-        return response
+        received = 0
+        too_large = False
+        response_started = False
+        
+        async def limited_receive():
+            nonlocal received, too_large
+            if too_large:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_size:
+                    # Stop feeding the body. The app may turn the disconnect
+                    # into its own error (FastAPI answers 400 for a body it
+                    # can't parse), so the limit is enforced here in send
+                    too_large = True
+                    return {"type": "http.disconnect"}
+            return message
+        
+        async def tracked_send(message):
+            nonlocal response_started
+            if too_large and not response_started:
+                # Whatever the app says about a truncated body, the 413
+                # below replaces it
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+        
+        try:
+            await self.app(scope, limited_receive, tracked_send)
+        except Exception:
+            if not too_large or response_started:
+                raise
+        
+        if too_large and not response_started:
+            await self._too_large()(scope, receive, send)
 
 
 def add_security_middleware(app, strict_mode: bool = True):
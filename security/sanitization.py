@@ -4,30 +4,101 @@ Security utilities for input sanitization and XSS prevention
 
 import html
 import re
+from collections import OrderedDict
+from functools import lru_cache
 from typing import Any, Dict, List, Optional
-import bleach
+import nh3
 from markupsafe import Markup
 
+# Patterns are compiled once at import instead of on every call
+_DANGEROUS_PATTERNS = tuple(
+    re.compile(pattern, re.IGNORECASE | re.DOTALL)
+    for pattern in [
+        r'<script[^>]*>.*?</script>',  # Script tags
+        r'javascript:',  # JavaScript protocol
+        r'vbscript:',   # VBScript protocol
+        r'on\w+\s*=',   # Event handlers (onclick, onload, etc.)
+        r'data:text/html',  # Data URLs with HTML
+    ]
+)
+
+# All dangerous patterns as one alternation, so a single scan covers them
+_DANGEROUS_UNION = re.compile(
+    '|'.join(f'(?:{pattern.pattern})' for pattern in _DANGEROUS_PATTERNS),
+    re.IGNORECASE | re.DOTALL
+)
+
+# Every dangerous pattern needs '<', ':' or '=', and html.escape only rewrites
+# &<>"' - text with none of these comes out of sanitize_text unchanged
+_SUSPECT_CHARS = frozenset('<>&"\':=')
+
+# Joins leaves for bulk sanitizing: no pattern matches NUL on its own and
+# html.escape leaves it alone, so the parts split back out intact
+_BULK_SEPARATOR = '\x00'
+
+# One pass masks every sensitive key: value pair, keeping the key name
+_LOG_MASK_RE = re.compile(
+    r'(?P<key>password|token|key|secret)["\']?\s*[:=]\s*["\']?[^"\'\s]+',
+    re.IGNORECASE
+)
+
+# Payload walking dispatches on the exact value type: str/dict/list are
+# visited, JSON scalars (None marks a leaf) are kept as-is. Other types are
+# classified once via isinstance and added here.
+_NODE_KINDS = {
+    str: str,
+    dict: dict,
+    list: list,
+    int: None,
+    float: None,
+    bool: None,
+    type(None): None,
+}
+
+
+_UNSEEN = object()
+
+
+def _node_kind(cls: type) -> Optional[type]:
+    """Classify a non-JSON type by its str/dict/list ancestry and remember it."""
+    for kind in (str, dict, list):
+        if issubclass(cls, kind):
+            break
+    else:
+        kind = None
+    _NODE_KINDS[cls] = kind
+    return kind
+
+
+# Validators are used with fullmatch: unlike ^...$ with match, it rejects
+# a trailing newline
+_EMAIL_RE = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+
+# Allow alphanumeric, underscore, hyphen, 3-30 characters
+_USERNAME_RE = re.compile(r'[a-zA-Z0-9_-]{3,30}')
+
 
 class InputSanitizer:
     """Sanitizes user input to prevent XSS and injection attacks."""
     
     # Allowed HTML tags for rich text (if needed)
-    ALLOWED_TAGS = ['b', 'i', 'em', 'strong', 'p', 'br']
+    ALLOWED_TAGS = {'b', 'i', 'em', 'strong', 'p', 'br'}
     
     # Allowed attributes
     ALLOWED_ATTRIBUTES = {}
     
+    # Cleaned HTML kept for reuse; shorter inputs are cheaper to re-clean
+    # than to cache
+    HTML_CACHE_SIZE = 512
+    HTML_CACHE_MIN_LENGTH = 64
+    
     def __init__(self):
         """Initialize the sanitizer."""
         self.max_length = 10000  # Maximum input length
-        self.patterns_to_remove = [
-            r'<script[^>]*>.*?</script>',  # Script tags
-            r'javascript:',  # JavaScript protocol
-            r'vbscript:',   # VBScript protocol
-            r'on\w+\s*=',   # Event handlers (onclick, onload, etc.)
-            r'data:text/html',  # Data URLs with HTML
-        ]
+        self.patterns_to_remove = _DANGEROUS_PATTERNS
+        # Recently cleaned HTML (knowledge-base docs and ticket templates
+        # repeat verbatim), most recently used last
+        self._html_cache: "OrderedDict[str, str]" = OrderedDict()
     
     def sanitize_text(self, text: str) -> str:
         """
@@ -39,22 +110,30 @@ class InputSanitizer:
         Returns:
             Sanitized text safe for display
         """
-        if not isinstance(text, str):
-            return str(text)
+        if not text:
+            return ''
         
-        # Truncate if too long
+        # Truncate if too long, before any scanning
         if len(text) > self.max_length:
             text = text[:self.max_length]
         
-        # Remove dangerous patterns
-        for pattern in self.patterns_to_remove:
-            text = re.sub(pattern, '', text, flags=re.IGNORECASE | re.DOTALL)
+        # Fast path for plain chat text
+        if _SUSPECT_CHARS.isdisjoint(text):
+            return text.strip()
         
-        # HTML escape special characters
-        text = html.escape(text, quote=True)
+        # Remove dangerous patterns. Rescan only if something was removed,
+        # since a removal can join fragments into a new match
+        # (e.g. "on<script></script>click=").
+        text, removed = _DANGEROUS_UNION.subn('', text)
+        while removed:
+            text, removed = _DANGEROUS_UNION.subn('', text)
         
-        # Remove any remaining HTML tags
-        text = bleach.clean(text, tags=[], attributes={}, strip=True)
+        # HTML escape special characters - no markup survives this, so no
+        # separate tag-stripping pass is needed. html.escape's chained
+        # str.replace calls beat a str.translate table here: translate takes
+        # its slow per-character path for multi-character replacements, and
+        # only text containing specials reaches this point.
+        text = html.escape(text, quote=True)
         
         return text.strip()
     
@@ -68,21 +147,37 @@ class InputSanitizer:
         Returns:
             Sanitized HTML safe for display
         """
-        if not isinstance(html_content, str):
-            return str(html_content)
-        
         # Truncate if too long
         if len(html_content) > self.max_length:
             html_content = html_content[:self.max_length]
         
-        # Use bleach to clean HTML
-        cleaned = bleach.clean(
+        cacheable = len(html_content) >= self.HTML_CACHE_MIN_LENGTH
+        if cacheable:
+            # Keyed on the content itself: a hash-only key could hand back
+            # another document's output on collision
+            cached = self._html_cache.get(html_content)
+            if cached is not None:
+                try:
+                    self._html_cache.move_to_end(html_content)
+                except KeyError:
+                    pass  # Evicted by a concurrent caller
+                return cached
+        
+        # Use nh3 (Rust ammonia) to clean HTML
+        cleaned = nh3.clean(
             html_content,
             tags=self.ALLOWED_TAGS,
-            attributes=self.ALLOWED_ATTRIBUTES,
-            strip=True
+            attributes=self.ALLOWED_ATTRIBUTES
         )
         
+        if cacheable:
+            self._html_cache[html_content] = cleaned
+            if len(self._html_cache) > self.HTML_CACHE_SIZE:
+                try:
+                    self._html_cache.popitem(last=False)
+                except KeyError:
+                    pass
+        
         return cleaned
     
     def sanitize_dict(self, data: Dict[str, Any]) -> Dict[str, Any]:
@@ -95,19 +190,7 @@ class InputSanitizer:
         Returns:
             Sanitized dictionary
         """
-        sanitized = {}
-        
-        for key, value in data.items():
-            if isinstance(value, str):
-                sanitized[key] = self.sanitize_text(value)
-            elif isinstance(value, dict):
-                sanitized[key] = self.sanitize_dict(value)
-            elif isinstance(value, list):
-                sanitized[key] = self.sanitize_list(value)
-            else:
-                sanitized[key] = value
-        
-        return sanitized
+        return self._sanitize_any(data)
     
     def sanitize_list(self, data: List[Any]) -> List[Any]:
         """
@@ -119,19 +202,92 @@ class InputSanitizer:
         Returns:
             Sanitized list
         """
-        sanitized = []
+        return self._sanitize_any(data)
+    
+    def sanitize_dict_bulk(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Sanitize a large nested payload in one regex pass.
         
-        for item in data:
-            if isinstance(item, str):
-                sanitized.append(self.sanitize_text(item))
-            elif isinstance(item, dict):
-                sanitized.append(self.sanitize_dict(item))
-            elif isinstance(item, list):
-                sanitized.append(self.sanitize_list(item))
+        Same output as sanitize_dict. String leaves that need more than a
+        strip are joined with a NUL separator, so pattern removal and
+        escaping run once over the whole payload instead of once per leaf.
+        Falls back to per-leaf sanitizing if a leaf contains NUL or a match
+        spans a separator.
+        
+        Args:
+            data: Dictionary to sanitize
+            
+        Returns:
+            Sanitized dictionary
+        """
+        leaves = []
+        result = self._sanitize_any(data, leaves)
+        if not leaves:
+            return result
+        
+        max_length = self.max_length
+        texts = [value[:max_length] for _, _, value in leaves]
+        joined = _BULK_SEPARATOR.join(texts)
+        parts = None
+        
+        if len(leaves) > 1 and joined.count(_BULK_SEPARATOR) == len(leaves) - 1:
+            joined, removed = _DANGEROUS_UNION.subn('', joined)
+            while removed:
+                joined, removed = _DANGEROUS_UNION.subn('', joined)
+            parts = html.escape(joined, quote=True).split(_BULK_SEPARATOR)
+        
+        if parts is not None and len(parts) == len(leaves):
+            for (parent, key, _), part in zip(leaves, parts):
+                parent[key] = part.strip()
+        else:
+            sanitize_text = self.sanitize_text
+            for parent, key, value in leaves:
+                parent[key] = sanitize_text(value)
+        
+        return result
+    
+    def _sanitize_any(self, obj: Any, leaves: Optional[list] = None) -> Any:
+        """
+        Sanitize every string in a nested dict/list payload.
+        
+        Walks the payload with an explicit stack instead of recursion, so
+        deeply nested input costs no Python frames and cannot hit the
+        recursion limit. Each container is copied once; each pending entry
+        is (output container, key or index, original value).
+        
+        If leaves is given, strings that need more than a strip are
+        appended to it as pending entries instead of being sanitized.
+        """
+        sanitize_text = self.sanitize_text
+        node_kinds = _NODE_KINDS
+        root = [obj]
+        stack = [(root, 0, obj)]
+        
+        while stack:
+            parent, key, value = stack.pop()
+            
+            cls = type(value)
+            kind = node_kinds.get(cls, _UNSEEN)
+            if kind is _UNSEEN:
+                kind = _node_kind(cls)
+            
+            if kind is None:
+                continue  # Leaves are already in place in the copied parent
+            if kind is str:
+                if leaves is not None and not _SUSPECT_CHARS.isdisjoint(value):
+                    leaves.append((parent, key, value))
+                else:
+                    parent[key] = sanitize_text(value)
+            elif kind is dict:
+                sanitized = dict(value)
+                parent[key] = sanitized
+                stack.extend((sanitized, k, v) for k, v in value.items())
             else:
-                sanitized.append(item)
+                sanitized = list(value)
+                parent[key] = sanitized
+                stack.extend((sanitized, i, v) for i, v in enumerate(value))
         
-        return sanitized
+        return root[0]
     
     def validate_message_length(self, message: str, max_length: int = 2000) -> bool:
         """
@@ -156,8 +312,7 @@ class InputSanitizer:
         Returns:
             True if valid email format, False otherwise
         """
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        return bool(re.match(pattern, email))
+        return bool(_EMAIL_RE.fullmatch(email))
     
     def validate_username(self, username: str) -> bool:
         """
@@ -169,14 +324,21 @@ class InputSanitizer:
         Returns:
             True if valid username format, False otherwise
         """
-        # Allow alphanumeric, underscore, hyphen, 3-30 characters
-        pattern = r'^[a-zA-Z0-9_-]{3,30}$'
-        return bool(re.match(pattern, username))
+        return bool(_USERNAME_RE.fullmatch(username))
 
 
 # Global sanitizer instance
 sanitizer = InputSanitizer()
 
+# Short messages (greetings, common queries) repeat constantly; longer ones
+# bypass the cache to bound its memory
+_CACHEABLE_LENGTH = 1024
+
+
+@lru_cache(maxsize=4096)
+def _cached_sanitize(text: str) -> str:
+    return sanitizer.sanitize_text(text)
+
 
 def sanitize_user_input(text: str) -> str:
     """
@@ -188,6 +350,12 @@ def sanitize_user_input(text: str) -> str:
     Returns:
         Sanitized text safe for processing
     """
+    # The sanitizer methods take str only; coerce once at this boundary,
+    # so the coerced text is sanitized too
+    if type(text) is not str:
+        text = str(text)
+    if len(text) < _CACHEABLE_LENGTH:
+        return _cached_sanitize(text)
     return sanitizer.sanitize_text(text)
 
 
@@ -201,20 +369,11 @@ def sanitize_for_logging(text: str) -> str:
     Returns:
         Sanitized text safe for logs
     """
-    if not isinstance(text, str):
-        return str(text)
+    if type(text) is not str:
+        text = str(text)
     
     # Remove potential sensitive patterns
-    patterns_to_mask = [
-        r'password["\']?\s*[:=]\s*["\']?[^"\'\s]+',  # password: value
-        r'token["\']?\s*[:=]\s*["\']?[^"\'\s]+',     # token: value
-        r'key["\']?\s*[:=]\s*["\']?[^"\'\s]+',       # key: value
-        r'secret["\']?\s*[:=]\s*["\']?[^"\'\s]+',   # secret: value
-    ]
-    
-    sanitized = text
-    for pattern in patterns_to_mask:
-        sanitized = re.sub(pattern, r'\1=***MASKED***', sanitized, flags=re.IGNORECASE)
+    sanitized = _LOG_MASK_RE.sub(r'\g<key>=***MASKED***', text)
     
     # Truncate long messages
     if len(sanitized) > 500:
@@ -0,0 +1,59 @@
+"""
+Test Suite for Security Middleware
+"""
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from security.middleware import RequestSizeMiddleware
+
+
+class Message(BaseModel):
+    text: str
+
+
+def _client(max_size: int = 100) -> TestClient:
+    app = FastAPI()
+    app.add_middleware(RequestSizeMiddleware, max_size=max_size)
+    
+    @app.post("/model")
+    async def model_body(message: Message):
+        return {"length": len(message.text)}
+    
+    @app.post("/raw")
+    async def raw_body(request: Request):
+        return {"length": len(await request.body())}
+    
+    return TestClient(app)
+
+
+def _chunks(payload: bytes, size: int = 16):
+    for start in range(0, len(payload), size):
+        yield payload[start:start + size]
+
+
+class TestRequestSizeMiddleware:
+    """Tests for RequestSizeMiddleware"""
+    
+    def test_declared_length_over_limit_rejected(self):
+        """A Content-Length above max_size is refused before the app runs"""
+        response = _client().post("/model", json={"text": "x" * 200})
+        assert response.status_code == 413
+        assert response.json() == {"detail": "Request too large"}
+    
+    def test_chunked_body_over_limit_on_model_endpoint(self):
+        """An oversized chunked body gets 413, not the app's body-parsing 400"""
+        body = ('{"text": "' + "x" * 200 + '"}').encode()
+        for path in ("/model", "/raw"):
+            response = _client().post(path, content=_chunks(body), headers={"Content-Type": "application/json"})
+            assert response.status_code == 413
+            assert response.json() == {"detail": "Request too large"}
+    
+    def test_body_under_limit_passes(self):
+        """Bodies within max_size reach the app, chunked or not"""
+        client = _client()
+        assert client.post("/model", json={"text": "hi"}).json() == {"length": 2}
+        body = b'{"text": "' + b"y" * 40 + b'"}'
+        response = client.post("/raw", content=_chunks(body), headers={"Content-Type": "application/json"})
+        assert response.json() == {"length": len(body)}
@@ -0,0 +1,118 @@
+"""
+Test Suite for Input Sanitization
+"""
+
+from security.sanitization import InputSanitizer, sanitizer, sanitize_for_logging, sanitize_user_input
+
+
+class TestSanitizeText:
+    """Tests for InputSanitizer.sanitize_text"""
+    
+    def test_escaped_entities_are_escaped_once(self):
+        """Entity-encoded lookalikes are escaped, not stripped or decoded"""
+        assert sanitizer.sanitize_text("&lt;script&gt;") == "&amp;lt;script&amp;gt;"
+    
+    def test_plain_text_unchanged(self):
+        """Text without markup, quotes or pattern delimiters passes through"""
+        assert sanitizer.sanitize_text("  Two tickets for Lakers on Friday?  ") == "Two tickets for Lakers on Friday?"
+    
+    def test_markup_is_escaped(self):
+        """Tags that survive pattern removal are escaped, never rendered"""
+        assert sanitizer.sanitize_text("<b>bold</b>") == "&lt;b&gt;bold&lt;/b&gt;"
+    
+    def test_dangerous_patterns_removed(self):
+        """Scripts, protocols and handlers are stripped, including rejoined ones"""
+        assert sanitizer.sanitize_text("<script>alert(1)</script>hi") == "hi"
+        assert sanitizer.sanitize_text("javascript:go()") == "go()"
+        assert sanitizer.sanitize_text("on<script></script>click=x") == "x"
+    
+    def test_user_input_coerced_then_sanitized(self):
+        """Non-str input is converted at the boundary and still sanitized"""
+        assert sanitize_user_input(["<b>"]) == "[&#x27;&lt;b&gt;&#x27;]"
+        assert sanitize_user_input(42) == "42"
+
+
+class TestSanitizeHtml:
+    """Tests for InputSanitizer.sanitize_html"""
+    
+    def test_allowed_tags_kept(self):
+        """Allow-listed tags survive, attributes and other tags do not"""
+        cleaned = sanitizer.sanitize_html('<p onclick="x">Hi <b>there</b><a href="#">l</a></p>')
+        assert cleaned == "<p>Hi <b>there</b>l</p>"
+    
+    def test_repeated_documents_cached(self):
+        """Long documents are cleaned once and served from the bounded cache"""
+        fresh = InputSanitizer()
+        fresh.HTML_CACHE_SIZE = 2
+        doc = "<p>" + "Courtside seats <script>x</script>" * 3 + "</p>"
+        assert fresh.sanitize_html(doc) == fresh.sanitize_html(doc)
+        assert list(fresh._html_cache) == [doc]
+        for i in range(3):
+            fresh.sanitize_html(doc + str(i) * 64)
+        assert doc not in fresh._html_cache
+        assert len(fresh._html_cache) == 2
+
+
+class TestValidators:
+    """Tests for email and username validation"""
+    
+    def test_email(self):
+        """Whole-string match, including no trailing newline"""
+        assert sanitizer.validate_email("fan@example.com")
+        assert not sanitizer.validate_email("fan@example.com\n")
+        assert not sanitizer.validate_email("not-an-email")
+    
+    def test_username(self):
+        """3-30 characters from the allowed set, nothing trailing"""
+        assert sanitizer.validate_username("lakers_fan-23")
+        assert not sanitizer.validate_username("ab")
+        assert not sanitizer.validate_username("lakers_fan\n")
+
+
+class TestSanitizeForLogging:
+    """Tests for sanitize_for_logging"""
+    
+    def test_secrets_masked(self):
+        """Secret values are replaced, keeping the key name"""
+        assert sanitize_for_logging("password=hunter2 ok") == "password=***MASKED*** ok"
+    
+    def test_every_key_masked_in_one_line(self):
+        """All sensitive keys in a line are masked"""
+        masked = sanitize_for_logging('token: abc SECRET="xyz" key=k1')
+        assert masked == 'token=***MASKED*** SECRET=***MASKED***" key=***MASKED***'
+    
+    def test_long_messages_truncated(self):
+        """Log lines are capped at 500 characters"""
+        assert sanitize_for_logging("x" * 600).endswith("... [TRUNCATED]")
+
+
+class TestSanitizeNested:
+    """Tests for sanitize_dict / sanitize_list"""
+    
+    def test_nested_payload(self):
+        """Strings at any depth are sanitized, other values and input untouched"""
+        payload = {"a": "<b>", "b": [1, None, {"c": ["<i>"]}]}
+        assert sanitizer.sanitize_dict(payload) == {"a": "&lt;b&gt;", "b": [1, None, {"c": ["&lt;i&gt;"]}]}
+        assert payload["a"] == "<b>"
+    
+    def test_deep_nesting_beyond_recursion_limit(self):
+        """Nesting deeper than the interpreter recursion limit is handled"""
+        payload = leaf = []
+        for _ in range(5000):
+            leaf.append([])
+            leaf = leaf[0]
+        leaf.append("<")
+        result = sanitizer.sanitize_list(payload)
+        for _ in range(5000):
+            result = result[0]
+        assert result == ["&lt;"]
+    
+    def test_bulk_matches_per_leaf(self):
+        """Bulk sanitizing gives the per-leaf result, including cross-leaf and NUL cases"""
+        payloads = [
+            {"a": " <b>x</b> ", "b": ["on<script></script>click=y", 3], "c": "plain"},
+            {"a": "<script", "b": "></script>tail"},
+            {"a": "nul\x00<i>", "b": "<b>"},
+        ]
+        for payload in payloads:
+            assert sanitizer.sanitize_dict_bulk(payload) == sanitizer.sanitize_dict(payload)
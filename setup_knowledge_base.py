@@ -3,16 +3,103 @@ Knowledge Base Setup for Ticket Information
 This script helps you create and populate a knowledge base for your RAG system
 """
 
+import asyncio
+import codecs
 import os
 import json
 import csv
-from typing import List, Dict, Any
+import re
+from itertools import islice
+from typing import List, Dict, Any, Generator, Iterable, Iterator, Optional, Tuple
 from google.cloud import aiplatform_v1
 from vertexai.language_models import TextEmbeddingModel
 import structlog
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
 logger = structlog.get_logger()
 
+# Maximum number of texts textembedding-gecko accepts per request
+EMBEDDING_BATCH_SIZE = 250
+
+# Batch requests kept in flight at once; keep within the project's embedding quota
+EMBEDDING_CONCURRENCY = 8
+
+_WORD_RE = re.compile(r'\S+')
+
+# Characters read from a plain text file at a time while chunking it
+TEXT_READ_SIZE = 65536
+
+
+def _json_load(f) -> Any:
+    if HAS_ORJSON:
+        return orjson.loads(f.read())
+    return json.load(f)
+
+
+def _json_dumps_indented(obj) -> str:
+    # Documents carry 768-float embeddings; orjson serializes those far faster
+    if HAS_ORJSON:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+    return json.dumps(obj, indent=2)
+
+
+# Built-in sample documents; create_sample_ticket_data hands out copies
+_SAMPLE_TICKET_DOCS = (
+    {
+        "id": "lakers-pricing-1",
+        "content": "Lakers vs Warriors - March 15, 2024 - Crypto.com Arena. Lower bowl seats: $150-300, Upper bowl: $50-120, Courtside: $800-2000. Game time: 7:30 PM PST.",
+        "source": "ticket_pricing",
+        "category": "pricing"
+    },
+    {
+        "id": "lakers-pricing-2", 
+        "content": "Lakers vs Celtics - March 20, 2024 - Crypto.com Arena. Lower bowl seats: $180-350, Upper bowl: $60-140, Courtside: $900-2200. Game time: 7:00 PM PST.",
+        "source": "ticket_pricing",
+        "category": "pricing"
+    },
+    {
+        "id": "upgrade-policy-1",
+        "content": "Seat upgrades available up to 2 hours before game time. Upgrade cost is the difference between current seat price and new seat price plus $25 processing fee. Upgrades subject to availability.",
+        "source": "upgrade_policy",
+        "category": "upgrades"
+    },
+    {
+        "id": "refund-policy-1",
+        "content": "Full refunds available up to 48 hours before game time. Partial refunds (75%) available 24-48 hours before. No refunds within 24 hours of game time. Exchanges may be available for a $15 fee.",
+        "source": "refund_policy",
+        "category": "refunds"
+    },
+    {
+        "id": "parking-info-1",
+        "content": "Crypto.com Arena parking: General parking $25-40, Premium parking $50-75, Valet parking $60-80. Parking opens 2 hours before game time. Limited street parking available.",
+        "source": "parking_info",
+        "category": "parking"
+    },
+    {
+        "id": "concessions-1",
+        "content": "Arena concessions: Beer $12-15, Soft drinks $6-8, Hot dogs $8-12, Pizza $15-20, Nachos $10-14. Premium dining options available in club sections.",
+        "source": "concessions",
+        "category": "food"
+    },
+    {
+        "id": "seating-chart-1",
+        "content": "Crypto.com Arena seating: Lower bowl sections 101-130 (closest to court), Upper bowl sections 301-330 (higher up), Club sections 200s (premium amenities), Courtside rows A-F (VIP experience).",
+        "source": "seating_info",
+        "category": "seating"
+    },
+    {
+        "id": "team-stats-1",
+        "content": "Lakers 2023-24 season: 45-25 record, 3rd in Western Conference. LeBron James averaging 25.2 points, Anthony Davis 24.8 points. Home record: 28-8, Away record: 17-17.",
+        "source": "team_stats",
+        "category": "statistics"
+    }
+)
+
 
 class KnowledgeBaseBuilder:
     """Build and manage knowledge base for ticket information."""
@@ -30,106 +117,87 @@ class KnowledgeBaseBuilder:
             logger.error("Failed to create embedding", error=str(e))
             raise
     
-    def process_ticket_data(self, data_source: str) -> List[Dict[str, Any]]:
-        """Process ticket data from various sources."""
-        documents = []
+    def process_ticket_data(self, data_source: str) -> Iterator[Dict[str, Any]]:
+        """
+        Process ticket data from various sources.
         
+        Documents are yielded lazily so large exports stream through
+        embedding and saving without being held in memory; wrap in list()
+        if random access is needed.
+        """
         if data_source.endswith('.json'):
-            documents = self._process_json_data(data_source)
+            return self._process_json_data(data_source)
         elif data_source.endswith('.csv'):
-            documents = self._process_csv_data(data_source)
+            return self._process_csv_data(data_source)
         elif data_source.endswith('.txt'):
-            documents = self._process_text_data(data_source)
+            return self._process_text_data(data_source)
         else:
             raise ValueError(f"Unsupported file format: {data_source}")
-        
-        return documents
     
-    def _process_json_data(self, file_path: str) -> List[Dict[str, Any]]:
+    def _process_json_data(self, file_path: str) -> Iterator[Dict[str, Any]]:
         """Process JSON ticket data."""
-        with open(file_path, 'r') as f:
-            data = json.load(f)
-        
-        documents = []
+        with open(file_path, 'rb') as f:
+            data = _json_load(f)
         
         # Handle different JSON structures
         if isinstance(data, list):
             for i, item in enumerate(data):
-                doc = self._create_document_from_dict(item, f"json_item_{i}")
-                documents.append(doc)
+                yield self._create_document_from_dict(item, f"json_item_{i}")
         elif isinstance(data, dict):
             # Handle nested structures
             for key, value in data.items():
                 if isinstance(value, (dict, list)):
-                    doc = self._create_document_from_dict(value, f"json_{key}")
-                    documents.append(doc)
+                    yield self._create_document_from_dict(value, f"json_{key}")
                 else:
-                    doc = {
+                    yield {
                         "id": f"json_{key}",
                         "content": f"{key}: {value}",
                         "source": "ticket_data",
                         "category": "general"
                     }
-                    documents.append(doc)
-        
-        return documents
     
-    def _process_csv_data(self, file_path: str) -> List[Dict[str, Any]]:
+    def _process_csv_data(self, file_path: str) -> Iterator[Dict[str, Any]]:
         """Process CSV ticket data."""
-        documents = []
-        
         with open(file_path, 'r') as f:
             reader = csv.DictReader(f)
             for i, row in enumerate(reader):
                 # Create content from all columns
-                content_parts = []
-                for key, value in row.items():
-                    if value and str(value).strip():
-                        content_parts.append(f"{key}: {value}")
-                
-                content = " | ".join(content_parts)
+                content = " | ".join(
+                    f"{key}: {value}" for key, value in row.items()
+                    if value and str(value).strip()
+                )
                 
-                doc = {
+                yield {
                     "id": f"csv_row_{i}",
                     "content": content,
                     "source": "ticket_data",
                     "category": "ticket_info"
                 }
-                documents.append(doc)
-        
-        return documents
     
-    def _process_text_data(self, file_path: str) -> List[Dict[str, Any]]:
-        """Process plain text ticket data."""
-        with open(file_path, 'r') as f:
-            content = f.read()
-        
-        # Split into chunks (you can customize this logic)
-        chunks = self._split_text_into_chunks(content, chunk_size=500)
-        
-        documents = []
-        for i, chunk in enumerate(chunks):
-            doc = {
-                "id": f"text_chunk_{i}",
-                "content": chunk,
-                "source": "ticket_data",
-                "category": "general"
-            }
-            documents.append(doc)
-        
-        return documents
+    def _process_text_data(self, file_path: str) -> Iterator[Dict[str, Any]]:
+        """Process plain text ticket data, reading the file a window at a time."""
+        with open(file_path, 'rb') as f:
+            # Decode raw windows directly; text mode's newline translation
+            # buys nothing when lines are split on whitespace anyway
+            pieces = codecs.iterdecode(iter(lambda: f.read(TEXT_READ_SIZE), b''), 'utf-8')
+            
+            # Split into chunks (you can customize this logic)
+            chunks = self._split_text_into_chunks(pieces, chunk_size=500)
+            
+            for i, chunk in enumerate(chunks):
+                yield {
+                    "id": f"text_chunk_{i}",
+                    "content": chunk,
+                    "source": "ticket_data",
+                    "category": "general"
+                }
     
     def _create_document_from_dict(self, data: Dict[str, Any], base_id: str) -> Dict[str, Any]:
         """Create a document from a dictionary."""
-        content_parts = []
-        
-        for key, value in data.items():
-            if isinstance(value, (dict, list)):
-                content_parts.append(f"{key}: {json.dumps(value)}")
-            else:
-                content_parts.append(f"{key}: {value}")
-        
-        content = " | ".join(content_parts)
+        content = " | ".join(
+            f"{key}: {json.dumps(value) if isinstance(value, (dict, list)) else value}"
+            for key, value in data.items()
+        )
         
         return {
             "id": base_id,
@@ -138,89 +206,144 @@ class KnowledgeBaseBuilder:
             "category": "ticket_info"
         }
     
-    def _split_text_into_chunks(self, text: str, chunk_size: int = 500) -> List[str]:
-        """Split text into manageable chunks."""
-        words = text.split()
-        chunks = []
-        current_chunk = []
-        current_length = 0
+    def _split_text_into_chunks(self, pieces: Iterable[str], chunk_size: int = 500) -> Iterator[str]:
+        """
+        Split streamed text into manageable chunks.
         
-        for word in words:
-            if current_length + len(word) + 1 > chunk_size and current_chunk:
-                chunks.append(" ".join(current_chunk))
-                current_chunk = [word]
-                current_length = len(word)
-            else:
-                current_chunk.append(word)
-                current_length += len(word) + 1
+        pieces can be any run of text windows, such as fixed-size file
+        reads. Each window is scanned at word boundaries and chunks are
+        sliced out of it by offset; only the text of the unfinished chunk
+        is carried into the next window.
+        """
+        carry = ""
+        resume = current_length = 0
+        for piece in pieces:
+            text = carry + piece
+            chunk_start, resume, current_length = yield from self._chunk_window(
+                text, chunk_size, resume, current_length, final=False
+            )
+            carry = text[chunk_start:]
+            resume -= chunk_start
+        if carry:
+            yield from self._chunk_window(carry, chunk_size, resume, current_length, final=True)
+    
+    @staticmethod
+    def _chunk_window(
+        text: str, chunk_size: int, resume: int, current_length: int, final: bool
+    ) -> Generator[str, None, Tuple[int, int, int]]:
+        """
+        Yield the complete chunks in text, scanning words from resume.
         
-        if current_chunk:
-            chunks.append(" ".join(current_chunk))
+        A non-zero current_length means text opens with an unfinished chunk
+        of that length. Unless final, the last chunk is left unfinished along
+        with any word running into the end of text; returns where it starts,
+        where to resume scanning and its length so far.
+        """
+        chunk_start = 0 if current_length else None
+        chunk_end = resume
         
-        return chunks
+        for match in _WORD_RE.finditer(text, resume):
+            word_start, word_end = match.span()
+            if word_end == len(text) and not final:
+                if chunk_start is None:
+                    return word_start, word_start, 0
+                return chunk_start, word_start, current_length
+            word_length = word_end - word_start
+            if current_length + word_length + 1 > chunk_size and chunk_start is not None:
+                # Collapse inner whitespace runs to single spaces
+                yield " ".join(text[chunk_start:chunk_end].split())
+                chunk_start = word_start
+                current_length = word_length
+            else:
+                if chunk_start is None:
+                    chunk_start = word_start
+                current_length += word_length + 1
+            chunk_end = word_end
+        
+        if final and chunk_start is not None:
+            yield " ".join(text[chunk_start:chunk_end].split())
+        if chunk_start is None:
+            return len(text), len(text), 0
+        return chunk_start, len(text), current_length
     
     def create_sample_ticket_data(self) -> List[Dict[str, Any]]:
         """Create sample ticket data for testing."""
-        return [
-            {
-                "id": "lakers-pricing-1",
-                "content": "Lakers vs Warriors - March 15, 2024 - Crypto.com Arena. Lower bowl seats: $150-300, Upper bowl: $50-120, Courtside: $800-2000. Game time: 7:30 PM PST.",
-                "source": "ticket_pricing",
-                "category": "pricing"
-            },
-            {
-                "id": "lakers-pricing-2", 
-                "content": "Lakers vs Celtics - March 20, 2024 - Crypto.com Arena. Lower bowl seats: $180-350, Upper bowl: $60-140, Courtside: $900-2200. Game time: 7:00 PM PST.",
-                "source": "ticket_pricing",
-                "category": "pricing"
-            },
-            {
-                "id": "upgrade-policy-1",
-                "content": "Seat upgrades available up to 2 hours before game time. Upgrade cost is the difference between current seat price and new seat price plus $25 processing fee. Upgrades subject to availability.",
-                "source": "upgrade_policy",
-                "category": "upgrades"
-            },
-            {
-                "id": "refund-policy-1",
-                "content": "Full refunds available up to 48 hours before game time. Partial refunds (75%) available 24-48 hours before. No refunds within 24 hours of game time. Exchanges may be available for a $15 fee.",
-                "source": "refund_policy",
-                "category": "refunds"
-            },
-            {
-                "id": "parking-info-1",
-                "content": "Crypto.com Arena parking: General parking $25-40, Premium parking $50-75, Valet parking $60-80. Parking opens 2 hours before game time. Limited street parking available.",
-                "source": "parking_info",
-                "category": "parking"
-            },
-            {
-                "id": "concessions-1",
-                "content": "Arena concessions: Beer $12-15, Soft drinks $6-8, Hot dogs $8-12, Pizza $15-20, Nachos $10-14. Premium dining options available in club sections.",
-                "source": "concessions",
-                "category": "food"
-            },
-            {
-                "id": "seating-chart-1",
-                "content": "Crypto.com Arena seating: Lower bowl sections 101-130 (closest to court), Upper bowl sections 301-330 (higher up), Club sections 200s (premium amenities), Courtside rows A-F (VIP experience).",
-                "source": "seating_info",
-                "category": "seating"
-            },
-            {
-                "id": "team-stats-1",
-                "content": "Lakers 2023-24 season: 45-25 record, 3rd in Western Conference. LeBron James averaging 25.2 points, Anthony Davis 24.8 points. Home record: 28-8, Away record: 17-17.",
-                "source": "team_stats",
-                "category": "statistics"
-            }
-        ]
+        return [dict(doc) for doc in _SAMPLE_TICKET_DOCS]
     
-    def save_documents_to_file(self, documents: List[Dict[str, Any]], output_file: str):
-        """Save processed documents to a file."""
-        with open(output_file, 'w') as f:
-            json.dump(documents, f, indent=2)
+    def save_documents_to_file(self, documents: Iterable[Dict[str, Any]], output_file: str) -> int:
+        """
+        Save processed documents to a file.
+        
+        Writes one document at a time (same layout as a 2-space indented
+        JSON array) so a generator is never materialized. Returns the count.
+        
+        The documents go to a temporary file next to output_file that only
+        replaces it once they are all written, so a failure partway through
+        leaves any earlier output intact.
+        """
+        count = 0
+        tmp_file = f"{output_file}.tmp"
+        try:
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                f.write('[')
+                for doc in documents:
+                    f.write(',\n  ' if count else '\n  ')
+                    f.write(_json_dumps_indented(doc).replace('\n', '\n  '))
+                    count += 1
+                f.write('\n]' if count else ']')
+            os.replace(tmp_file, output_file)
+        except BaseException:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+            raise
+        
+        logger.info(f"Saved {count} documents to {output_file}")
+        return count
+    
+    def create_embeddings_for_documents(self, documents: Iterable[Dict[str, Any]],
+                                        concurrency: int = EMBEDDING_CONCURRENCY) -> Iterator[Dict[str, Any]]:
+        """
+        Create embeddings for all documents, one request per batch.
+        
+        Documents are pulled in windows of `concurrency` batches whose
+        requests run concurrently, so memory stays bounded by one window.
+        """
+        documents = iter(documents)
+        window_size = EMBEDDING_BATCH_SIZE * concurrency
+        
+        with asyncio.Runner() as runner:
+            while window := list(islice(documents, window_size)):
+                yield from runner.run(self.create_embeddings_async(window, concurrency))
+    
+    async def create_embeddings_async(self, documents: List[Dict[str, Any]],
+                                      concurrency: int = EMBEDDING_CONCURRENCY) -> List[Dict[str, Any]]:
+        """Create embeddings with up to `concurrency` batch requests in flight, preserving order."""
+        semaphore = asyncio.Semaphore(concurrency)
+        batches = [
+            documents[offset:offset + EMBEDDING_BATCH_SIZE]
+            for offset in range(0, len(documents), EMBEDDING_BATCH_SIZE)
+        ]
+        
+        async def embed_batch(batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            async with semaphore:
+                try:
+                    embeddings = await self.embedding_model.get_embeddings_async(
+                        [doc["content"] for doc in batch]
+                    )
+                except Exception as e:
+                    # Fall back to one request per document so a single bad text
+                    # only drops itself, not the whole batch
+                    logger.error(f"Failed to create embeddings for batch of {len(batch)}, retrying per document: {str(e)}")
+                    return await asyncio.to_thread(self._embed_individually, batch)
+            logger.info(f"Created embeddings for {len(batch)} documents")
+            return [{**doc, "embedding": embedding.values} for doc, embedding in zip(batch, embeddings)]
         
-        logger.info(f"Saved {len(documents)} documents to {output_file}")
+        # gather returns results in batch order regardless of completion order
+        results = await asyncio.gather(*(embed_batch(batch) for batch in batches))
+        return [doc for batch_docs in results for doc in batch_docs]
     
-    def create_embeddings_for_documents(self, documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Create embeddings for all documents."""
+    def _embed_individually(self, documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Create embeddings one document at a time, skipping failures."""
         enhanced_docs = []
         
         for doc in documents:
@@ -347,8 +470,8 @@ if __name__ == "__main__":
             print("Creating embeddings...")
             documents = builder.create_embeddings_for_documents(documents)
         
-        builder.save_documents_to_file(documents, args.output)
-        print(f"Processed {len(documents)} documents and saved to {args.output}")
+        count = builder.save_documents_to_file(documents, args.output)
+        print(f"Processed {count} documents and saved to {args.output}")
     
     if not args.create_samples and not args.process_file:
         print("Usage examples:")
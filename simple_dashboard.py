@@ -3,19 +3,25 @@ Simple Analytics Dashboard Server (Local Testing)
 Serves the analytics dashboard locally without Google Cloud dependencies
 """
 
-import json
 import datetime
-import random
 import csv
 import io
 import base64
-from typing import Dict, Any, Optional, List
-from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect, Depends, HTTPException, Form
+import hashlib
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Any, Optional, List, Sequence, Set, Tuple
+from fastapi import FastAPI, Request, Response, WebSocket, WebSocketDisconnect, Depends, HTTPException, Form
 from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+import numpy as np
 import uvicorn
 import asyncio
 import secrets
@@ -25,6 +31,9 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib import colors
 from reportlab.lib.units import inch
 
+from json_utils import ORJSONResponse, json_dumps_bytes
+
+
 app = FastAPI(title="Qwen Messaging Agent Analytics Dashboard")
 
 # Add CORS middleware
@@ -36,6 +45,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress larger JSON/CSV responses; smaller bodies aren't worth the CPU
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -44,13 +56,70 @@ templates = Jinja2Templates(directory="templates")
 
 # Authentication
 security = HTTPBasic()
-WEBSOCKET_CONNECTIONS = []
+WEBSOCKET_CONNECTIONS: Set[WebSocket] = set()
+BROADCAST_CHUNK_SIZE = 50
 ALERT_THRESHOLDS = {
     "success_rate_min": 0.85,
     "avg_duration_max": 5000,
     "sentiment_min": 0.3
 }
 
+# Thresholds as shown in alert messages, formatted once
+_SUCCESS_RATE_THRESHOLD = f"{ALERT_THRESHOLDS['success_rate_min']:.1%}"
+_DURATION_THRESHOLD = f"{ALERT_THRESHOLDS['avg_duration_max']:.0f}ms"
+_SENTIMENT_THRESHOLD = f"{ALERT_THRESHOLDS['sentiment_min']:.2f}"
+
+# Response timestamps are shared within this window
+TIMESTAMP_RESOLUTION_SECONDS = 0.1
+_TS_CACHE = {"t": float("-inf"), "s": ""}
+
+# Shared, immutable result for the no-alert case
+_NO_ALERTS = ()
+
+# Generated data is reused for identical date ranges within this window
+SAMPLE_DATA_TTL_SECONDS = 60
+SAMPLE_DATA_CACHE_SIZE = 128
+_sample_data_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+
+# Shared generator for the batched sample-data draws
+_rng = np.random.default_rng()
+
+# Fixed parts of the sample flows and topics; generate_sample_data fills in
+# the per-call count and frequency
+_FLOW_TEMPLATES = [
+    {"flow_type": "short_conversation", "avg_duration": 1800, "avg_messages": 3.2},
+    {"flow_type": "medium_conversation", "avg_duration": 3500, "avg_messages": 7.8},
+    {"flow_type": "single_message", "avg_duration": 1200, "avg_messages": 1.0},
+    {"flow_type": "long_conversation", "avg_duration": 6000, "avg_messages": 15.2}
+]
+_FLOW_SHARES = np.array([0.5, 0.35, 0.1, 0.05])
+
+_TOPIC_TEMPLATES = [
+    {
+        "user_message": "I need help with my Lakers tickets",
+        "agent_response": "I'd be happy to help you with your Lakers tickets. What specific assistance do you need?"
+    },
+    {
+        "user_message": "Can I upgrade my seat?",
+        "agent_response": "Absolutely! I can help you upgrade your seat. Let me check what options are available."
+    },
+    {
+        "user_message": "What time does the game start?",
+        "agent_response": "The game starts at 7:30 PM. Gates open at 6:00 PM for early entry."
+    },
+    {
+        "user_message": "I lost my ticket confirmation",
+        "agent_response": "No worries! I can help you retrieve your ticket confirmation. What's your email address?"
+    },
+    {
+        "user_message": "Can I get a refund?",
+        "agent_response": "I can help you with refund options. Refunds are available up to 48 hours before the event."
+    }
+]
+# Inclusive frequency range per topic, in _TOPIC_TEMPLATES order
+_TOPIC_FREQUENCY_LOW = np.array([50, 30, 40, 20, 15])
+_TOPIC_FREQUENCY_HIGH = np.array([150, 100, 120, 80, 60])
+
 # Custom branding colors
 BRAND_COLORS = {
     "primary": "#667eea",
@@ -63,6 +132,27 @@ BRAND_COLORS = {
 }
 
 
+# Report styles never change between exports, so build them once
+_PRIMARY_COLOR = colors.HexColor(BRAND_COLORS["primary"])
+_PDF_STYLES = getSampleStyleSheet()
+_PDF_TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    parent=_PDF_STYLES['Heading1'],
+    fontSize=24,
+    spaceAfter=30,
+    textColor=_PRIMARY_COLOR
+)
+_PDF_METRICS_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), _PRIMARY_COLOR),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 14),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+])
+
 def verify_credentials(credentials: HTTPBasicCredentials = Depends(security)):
     """Verify user credentials."""
     correct_username = secrets.compare_digest(credentials.username, "admin")
@@ -79,62 +169,111 @@ def verify_credentials(credentials: HTTPBasicCredentials = Depends(security)):
 async def broadcast_update(data: Dict[str, Any]):
     """Broadcast updates to all connected WebSocket clients."""
     if WEBSOCKET_CONNECTIONS:
-        message = json.dumps(data)
-        disconnected = []
-        for connection in WEBSOCKET_CONNECTIONS:
-            try:
-                await connection.send_text(message)
-            except:
-                disconnected.append(connection)
-        
-        # Remove disconnected clients
-        for conn in disconnected:
-            WEBSOCKET_CONNECTIONS.remove(conn)
+        # Encoded once and sent as-is to every client
+        await broadcast_message(json_dumps_bytes(data))
 
 
-def check_alerts(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+async def broadcast_message(message: bytes):
+    """Broadcast an already-encoded JSON message to all connected clients."""
+    if WEBSOCKET_CONNECTIONS:
+        connections = list(WEBSOCKET_CONNECTIONS)
+        
+        # Send to a chunk of clients concurrently, so one slow client does
+        # not hold up the rest, and yield between chunks so large fan-outs
+        # don't starve HTTP handlers
+        for start in range(0, len(connections), BROADCAST_CHUNK_SIZE):
+            chunk = connections[start:start + BROADCAST_CHUNK_SIZE]
+            results = await asyncio.gather(
+                *(connection.send_bytes(message) for connection in chunk),
+                return_exceptions=True
+            )
+            
+            # Remove disconnected clients
+            for connection, result in zip(chunk, results):
+                if isinstance(result, Exception):
+                    WEBSOCKET_CONNECTIONS.discard(connection)
+            
+            if start + BROADCAST_CHUNK_SIZE < len(connections):
+                await asyncio.sleep(0)
+
+
+def _now_iso() -> str:
+    """Current UTC time in ISO format, refreshed at most every 100 ms."""
+    now = time.monotonic()
+    if now - _TS_CACHE["t"] > TIMESTAMP_RESOLUTION_SECONDS:
+        _TS_CACHE["t"] = now
+        _TS_CACHE["s"] = datetime.datetime.utcnow().isoformat()
+    return _TS_CACHE["s"]
+
+
+def check_alerts(data: Dict[str, Any]) -> Sequence[Dict[str, Any]]:
     """Check if any metrics exceed alert thresholds."""
-    alerts = []
     overall = data.get("business_metrics", {}).get("overall_metrics", {})
-    
     success_rate = overall.get("success_rate", 0)
-    if success_rate < ALERT_THRESHOLDS["success_rate_min"]:
+    avg_duration = overall.get("avg_duration_ms", 0)
+    
+    sentiment_trends = data.get("sentiment_trends", {})
+    avg_sentiment = sentiment_trends.get("avg_sentiment")
+    if avg_sentiment is None:
+        # Data not built by generate_sample_data: average the daily values
+        sentiment_data = sentiment_trends.get("daily_sentiment", [])
+        if sentiment_data:
+            avg_sentiment = sum(d["avg_sentiment"] for d in sentiment_data) / len(sentiment_data)
+    
+    low_success = success_rate < ALERT_THRESHOLDS["success_rate_min"]
+    slow = avg_duration > ALERT_THRESHOLDS["avg_duration_max"]
+    low_sentiment = avg_sentiment is not None and avg_sentiment < ALERT_THRESHOLDS["sentiment_min"]
+    
+    # Healthy data is the common case: nothing to build
+    if not (low_success or slow or low_sentiment):
+        return _NO_ALERTS
+    
+    alerts = []
+    if low_success:
         alerts.append({
             "type": "warning",
             "metric": "Success Rate",
             "value": f"{success_rate:.1%}",
-            "threshold": f"{ALERT_THRESHOLDS['success_rate_min']:.1%}",
-            "message": f"Success rate ({success_rate:.1%}) below threshold ({ALERT_THRESHOLDS['success_rate_min']:.1%})"
+            "threshold": _SUCCESS_RATE_THRESHOLD,
+            "message": f"Success rate ({success_rate:.1%}) below threshold ({_SUCCESS_RATE_THRESHOLD})"
         })
     
-    avg_duration = overall.get("avg_duration_ms", 0)
-    if avg_duration > ALERT_THRESHOLDS["avg_duration_max"]:
+    if slow:
         alerts.append({
             "type": "warning",
             "metric": "Average Duration",
             "value": f"{avg_duration:.0f}ms",
-            "threshold": f"{ALERT_THRESHOLDS['avg_duration_max']:.0f}ms",
-            "message": f"Average response time ({avg_duration:.0f}ms) above threshold ({ALERT_THRESHOLDS['avg_duration_max']:.0f}ms)"
+            "threshold": _DURATION_THRESHOLD,
+            "message": f"Average response time ({avg_duration:.0f}ms) above threshold ({_DURATION_THRESHOLD})"
         })
     
-    # Check sentiment
-    sentiment_data = data.get("sentiment_trends", {}).get("daily_sentiment", [])
-    if sentiment_data:
-        avg_sentiment = sum(d["avg_sentiment"] for d in sentiment_data) / len(sentiment_data)
-        if avg_sentiment < ALERT_THRESHOLDS["sentiment_min"]:
-            alerts.append({
-                "type": "danger",
-                "metric": "Customer Sentiment",
-                "value": f"{avg_sentiment:.2f}",
-                "threshold": f"{ALERT_THRESHOLDS['sentiment_min']:.2f}",
-                "message": f"Customer sentiment ({avg_sentiment:.2f}) below threshold ({ALERT_THRESHOLDS['sentiment_min']:.2f})"
-            })
+    if low_sentiment:
+        alerts.append({
+            "type": "danger",
+            "metric": "Customer Sentiment",
+            "value": f"{avg_sentiment:.2f}",
+            "threshold": _SENTIMENT_THRESHOLD,
+            "message": f"Customer sentiment ({avg_sentiment:.2f}) below threshold ({_SENTIMENT_THRESHOLD})"
+        })
     
     return alerts
 
 
 def generate_sample_data(start_date: Optional[datetime.datetime] = None, end_date: Optional[datetime.datetime] = None) -> Dict[str, Any]:
     """Generate realistic sample data for the dashboard."""
+    business_metrics = _gen_business_metrics(start_date, end_date)
+    
+    return {
+        "business_metrics": business_metrics,
+        "conversation_flows": _gen_flows(business_metrics["overall_metrics"]["total_conversations"]),
+        "sentiment_trends": _gen_sentiment(business_metrics["daily_metrics"]),
+        "topics": _gen_topics(),
+        "generated_at": _now_iso()
+    }
+
+
+def _gen_business_metrics(start_date: Optional[datetime.datetime], end_date: Optional[datetime.datetime]) -> Dict[str, Any]:
+    """Generate daily and overall conversation metrics for a date range."""
     
     # Default to last 30 days if no dates provided
     if not end_date:
@@ -142,224 +281,283 @@ def generate_sample_data(start_date: Optional[datetime.datetime] = None, end_dat
     if not start_date:
         start_date = end_date - datetime.timedelta(days=30)
     
-    # Generate daily metrics for the specified period
-    daily_metrics = []
-    current_date = start_date
-    days_diff = (end_date - start_date).days
+    # Generate daily metrics for the specified period, drawing each column
+    # for all days at once
+    n_days = (end_date - start_date).days + 1
     
-    for i in range(days_diff + 1):
-        total_convs = random.randint(40, 80)
-        success_rate = random.uniform(0.85, 0.98)
-        successful_convs = int(total_convs * success_rate)
-        
-        daily_metrics.append({
-            "date": current_date.strftime("%Y-%m-%d"),
-            "total_conversations": total_convs,
-            "successful_conversations": successful_convs,
-            "failed_conversations": total_convs - successful_convs,
-            "success_rate": success_rate,
-            "avg_duration": random.randint(2000, 4000),
-            "avg_message_length": random.randint(20, 40),
-            "avg_response_length": random.randint(100, 200),
-            "unique_conversations": int(total_convs * 0.9)
-        })
-        current_date += datetime.timedelta(days=1)
+    dates = np.datetime64(start_date.date(), "D") + np.arange(n_days)
+    total = _rng.integers(40, 81, n_days)
+    success_rates = _rng.uniform(0.85, 0.98, n_days)
+    successful = (total * success_rates).astype(int)
+    durations = _rng.integers(2000, 4001, n_days)
     
+    # Columnar: one list per field instead of one dict per day
+    daily_metrics = {
+        "date": dates.astype(str).tolist(),
+        "total_conversations": total.tolist(),
+        "successful_conversations": successful.tolist(),
+        "failed_conversations": (total - successful).tolist(),
+        "success_rate": success_rates.tolist(),
+        "avg_duration": durations.tolist(),
+        "avg_message_length": _rng.integers(20, 41, n_days).tolist(),
+        "avg_response_length": _rng.integers(100, 201, n_days).tolist(),
+        "unique_conversations": (total * 0.9).astype(int).tolist()
+    }
     # Calculate overall metrics
-    total_convs = sum(d["total_conversations"] for d in daily_metrics)
-    successful_convs = sum(d["successful_conversations"] for d in daily_metrics)
-    avg_duration = sum(d["avg_duration"] for d in daily_metrics) / len(daily_metrics)
+    total_convs = int(total.sum())
+    successful_convs = int(successful.sum())
     
-    # Generate conversation flows
-    flows = [
-        {
-            "flow_type": "short_conversation",
-            "count": int(total_convs * 0.5),
-            "avg_duration": 1800,
-            "avg_messages": 3.2
-        },
-        {
-            "flow_type": "medium_conversation", 
-            "count": int(total_convs * 0.35),
-            "avg_duration": 3500,
-            "avg_messages": 7.8
-        },
-        {
-            "flow_type": "single_message",
-            "count": int(total_convs * 0.1),
-            "avg_duration": 1200,
-            "avg_messages": 1.0
+    return {
+        "overall_metrics": {
+            "total_conversations": total_convs,
+            "successful_conversations": successful_convs,
+            "success_rate": successful_convs / total_convs,
+            "avg_duration_ms": float(durations.mean()),
+            "period_days": 30
         },
+        "daily_metrics": daily_metrics
+    }
+
+
+def _gen_flows(total_convs: int) -> Dict[str, Any]:
+    """Generate conversation flows splitting the period's conversations."""
+    flow_counts = (total_convs * _FLOW_SHARES).astype(int).tolist()
+    return {
+        "flows": [
+            {**template, "count": count}
+            for template, count in zip(_FLOW_TEMPLATES, flow_counts)
+        ]
+    }
+
+
+def _gen_sentiment(daily_metrics: Dict[str, List[Any]]) -> Dict[str, Any]:
+    """Generate sentiment trends, varying slightly day by day."""
+    sentiment_draws = _rng.uniform(0.3, 0.8, len(daily_metrics["date"]))
+    daily_sentiment = [
         {
-            "flow_type": "long_conversation",
-            "count": int(total_convs * 0.05),
-            "avg_duration": 6000,
-            "avg_messages": 15.2
-        }
-    ]
-    
-    # Generate sentiment trends
-    daily_sentiment = []
-    for i, day in enumerate(daily_metrics):
-        # Vary sentiment slightly day by day
-        base_sentiment = random.uniform(0.3, 0.8)
-        daily_sentiment.append({
-            "date": day["date"],
+            "date": date,
             "avg_sentiment": base_sentiment,
             "sentiment_label": "positive" if base_sentiment > 0.5 else "neutral",
-            "message_count": day["total_conversations"]
-        })
-    
-    # Generate sample topics
-    sample_topics = [
-        {
-            "user_message": "I need help with my Lakers tickets",
-            "agent_response": "I'd be happy to help you with your Lakers tickets. What specific assistance do you need?",
-            "frequency": random.randint(50, 150)
-        },
-        {
-            "user_message": "Can I upgrade my seat?",
-            "agent_response": "Absolutely! I can help you upgrade your seat. Let me check what options are available.",
-            "frequency": random.randint(30, 100)
-        },
-        {
-            "user_message": "What time does the game start?",
-            "agent_response": "The game starts at 7:30 PM. Gates open at 6:00 PM for early entry.",
-            "frequency": random.randint(40, 120)
-        },
-        {
-            "user_message": "I lost my ticket confirmation",
-            "agent_response": "No worries! I can help you retrieve your ticket confirmation. What's your email address?",
-            "frequency": random.randint(20, 80)
-        },
-        {
-            "user_message": "Can I get a refund?",
-            "agent_response": "I can help you with refund options. Refunds are available up to 48 hours before the event.",
-            "frequency": random.randint(15, 60)
+            "message_count": message_count
         }
+        for date, message_count, base_sentiment in zip(
+            daily_metrics["date"], daily_metrics["total_conversations"], sentiment_draws.tolist()
+        )
     ]
-    
     return {
-        "business_metrics": {
-            "overall_metrics": {
-                "total_conversations": total_convs,
-                "successful_conversations": successful_convs,
-                "success_rate": successful_convs / total_convs,
-                "avg_duration_ms": avg_duration,
-                "period_days": 30
-            },
-            "daily_metrics": daily_metrics
-        },
-        "conversation_flows": {
-            "flows": flows
-        },
-        "sentiment_trends": {
-            "daily_sentiment": daily_sentiment
-        },
-        "topics": {
-            "topics": sample_topics
-        },
-        "generated_at": datetime.datetime.utcnow().isoformat()
+        "daily_sentiment": daily_sentiment,
+        "avg_sentiment": float(sentiment_draws.mean())
+    }
+
+
+def _gen_topics() -> Dict[str, Any]:
+    """Generate sample topics with randomized frequencies."""
+    frequencies = _rng.integers(_TOPIC_FREQUENCY_LOW, _TOPIC_FREQUENCY_HIGH + 1).tolist()
+    return {
+        "topics": [
+            {**template, "frequency": frequency}
+            for template, frequency in zip(_TOPIC_TEMPLATES, frequencies)
+        ]
     }
 
 
+def _with_daily_rows(business_metrics: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of business_metrics with daily_metrics as one dict per day (format=aos)."""
+    columns = business_metrics["daily_metrics"]
+    return {
+        **business_metrics,
+        "daily_metrics": [dict(zip(columns, row)) for row in zip(*columns.values())]
+    }
+
+
+@lru_cache(maxsize=64)
+def _parse_date(value: Optional[str]) -> Optional[datetime.datetime]:
+    """Parse a YYYY-MM-DD query parameter to midnight of that day."""
+    if not value:
+        return None
+    # date.fromisoformat is implemented in C, unlike strptime
+    return datetime.datetime.combine(datetime.date.fromisoformat(value), datetime.time())
+
+
+def _fresh_sample_data(key: tuple) -> Optional[Dict[str, Any]]:
+    """Return cached sample data for key if it is still within the TTL."""
+    entry = _sample_data_cache.get(key)
+    if entry is None or time.monotonic() - entry[0] >= SAMPLE_DATA_TTL_SECONDS:
+        return None
+    _sample_data_cache.move_to_end(key)
+    return entry[1]
+
+
+def get_sample_data(start_date: Optional[datetime.datetime] = None, end_date: Optional[datetime.datetime] = None) -> Dict[str, Any]:
+    """
+    Return sample data for a date range, regenerating at most once per TTL.
+    
+    The returned dict is shared between requests and must not be mutated.
+    """
+    key = (start_date, end_date)
+    data = _fresh_sample_data(key)
+    if data is not None:
+        return data
+    
+    data = generate_sample_data(start_date, end_date)
+    _sample_data_cache[key] = (time.monotonic(), data)
+    _sample_data_cache.move_to_end(key)
+    if len(_sample_data_cache) > SAMPLE_DATA_CACHE_SIZE:
+        _sample_data_cache.popitem(last=False)
+    
+    return data
+
+
+def get_sample_section(section: str) -> Dict[str, Any]:
+    """
+    Return one top-level section of the default-range sample data.
+    
+    Slices the cached full data when it is fresh; otherwise generates only
+    what the section needs instead of the whole dashboard.
+    """
+    data = _fresh_sample_data((None, None))
+    if data is not None:
+        return data[section]
+    
+    if section == "topics":
+        return _gen_topics()
+    
+    business_metrics = _gen_business_metrics(None, None)
+    if section == "conversation_flows":
+        return _gen_flows(business_metrics["overall_metrics"]["total_conversations"])
+    if section == "sentiment_trends":
+        return _gen_sentiment(business_metrics["daily_metrics"])
+    return business_metrics
+
+
+@lru_cache(maxsize=1)
+def _load_dashboard_html() -> Tuple[bytes, str]:
+    """Read the dashboard page once; returns the body and its ETag."""
+    html_bytes = Path("templates/dashboard.html").read_bytes()
+    etag = f'"{hashlib.blake2b(html_bytes, digest_size=8).hexdigest()}"'
+    return html_bytes, etag
+
+
 @app.get("/", response_class=HTMLResponse)
 async def dashboard_home(request: Request, username: str = Depends(verify_credentials)):
     """Main dashboard page with authentication."""
     try:
-        with open("templates/dashboard.html", "r") as f:
-            html_content = f.read()
-        return HTMLResponse(content=html_content)
+        # A failed read is not cached, so a missing file is retried next time
+        html_content, etag = _load_dashboard_html()
     except Exception as e:
         return HTMLResponse(content=f"<h1>Error</h1><p>{str(e)}</p>")
+    
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return HTMLResponse(content=html_content, headers={"ETag": etag})
 
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     """WebSocket endpoint for real-time updates."""
     await websocket.accept()
-    WEBSOCKET_CONNECTIONS.append(websocket)
+    WEBSOCKET_CONNECTIONS.add(websocket)
     try:
         while True:
             # Keep connection alive
             await websocket.receive_text()
     except WebSocketDisconnect:
-        WEBSOCKET_CONNECTIONS.remove(websocket)
+        WEBSOCKET_CONNECTIONS.discard(websocket)
 
 
 @app.get("/api/dashboard")
 async def get_full_dashboard(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
+    format: Optional[str] = None,
     username: str = Depends(verify_credentials)
 ):
-    """Get complete dashboard data as JSON with date range support."""
+    """
+    Get complete dashboard data as JSON with date range support.
+    
+    daily_metrics is columnar (one list per field); pass format=aos for
+    the older one-object-per-day layout.
+    """
     try:
         # Parse date parameters
-        start_dt = None
-        end_dt = None
-        
-        if start_date:
-            start_dt = datetime.datetime.strptime(start_date, "%Y-%m-%d")
-        if end_date:
-            end_dt = datetime.datetime.strptime(end_date, "%Y-%m-%d")
+        start_dt = _parse_date(start_date)
+        end_dt = _parse_date(end_date)
         
-        dashboard_data = generate_sample_data(start_dt, end_dt)
+        dashboard_data = get_sample_data(start_dt, end_dt)
         
-        # Add alerts
+        # Add alerts (on a copy; the cached data is shared)
         alerts = check_alerts(dashboard_data)
-        dashboard_data["alerts"] = alerts
-        
-        # Broadcast update to WebSocket clients
-        await broadcast_update({
-            "type": "dashboard_update",
-            "data": dashboard_data,
-            "timestamp": datetime.datetime.utcnow().isoformat()
-        })
-        
-        return JSONResponse(content=dashboard_data)
+        dashboard_data = {**dashboard_data, "alerts": alerts}
+        
+        # Encode the dashboard once, for both the reply and the broadcast
+        body = json_dumps_bytes(dashboard_data)
+        
+        # Broadcast update to WebSocket clients, splicing the encoded
+        # dashboard into the update envelope
+        if WEBSOCKET_CONNECTIONS:
+            timestamp = json_dumps_bytes(_now_iso())
+            await broadcast_message(
+                b'{"type":"dashboard_update","data":' + body + b',"timestamp":' + timestamp + b'}'
+            )
+        
+        if format == "aos":
+            return ORJSONResponse(content={
+                **dashboard_data,
+                "business_metrics": _with_daily_rows(dashboard_data["business_metrics"])
+            })
+        return Response(content=body, media_type="application/json")
     except Exception as e:
-        return JSONResponse(content={"error": str(e)}, status_code=500)
+        return ORJSONResponse(content={"error": str(e)}, status_code=500)
 
 
 @app.get("/api/metrics")
-async def get_metrics():
-    """Get business metrics as JSON."""
+async def get_metrics(format: Optional[str] = None):
+    """Get business metrics as JSON (columnar daily_metrics unless format=aos)."""
     try:
-        data = generate_sample_data()
-        return JSONResponse(content=data["business_metrics"])
+        business_metrics = get_sample_section("business_metrics")
+        if format == "aos":
+            business_metrics = _with_daily_rows(business_metrics)
+        return ORJSONResponse(content=business_metrics)
     except Exception as e:
-        return JSONResponse(content={"error": str(e)}, status_code=500)
+        return ORJSONResponse(content={"error": str(e)}, status_code=500)
 
 
 @app.get("/api/flows")
 async def get_conversation_flows():
     """Get conversation flow analysis as JSON."""
     try:
-        data = generate_sample_data()
-        return JSONResponse(content=data["conversation_flows"])
+        return ORJSONResponse(content=get_sample_section("conversation_flows"))
     except Exception as e:
-        return JSONResponse(content={"error": str(e)}, status_code=500)
+        return ORJSONResponse(content={"error": str(e)}, status_code=500)
 
 
 @app.get("/api/sentiment")
 async def get_sentiment_analysis():
     """Get sentiment analysis as JSON."""
     try:
-        data = generate_sample_data()
-        return JSONResponse(content=data["sentiment_trends"])
+        return ORJSONResponse(content=get_sample_section("sentiment_trends"))
     except Exception as e:
-        return JSONResponse(content={"error": str(e)}, status_code=500)
+        return ORJSONResponse(content={"error": str(e)}, status_code=500)
 
 
 @app.get("/api/topics")
 async def get_topics():
     """Get conversation topics as JSON."""
     try:
-        data = generate_sample_data()
-        return JSONResponse(content=data["topics"])
+        return ORJSONResponse(content=get_sample_section("topics"))
     except Exception as e:
-        return JSONResponse(content={"error": str(e)}, status_code=500)
+        return ORJSONResponse(content={"error": str(e)}, status_code=500)
+
+
+# Header line for the CSV export, encoded once
+_CSV_EXPORT_HEADER = ",".join([
+    "Date", "Total Conversations", "Successful", "Failed",
+    "Success Rate", "Avg Duration (ms)", "Avg Message Length",
+    "Avg Response Length", "Unique Conversations"
+]).encode() + b"\r\n"
+
+# Rows written per streamed chunk
+CSV_EXPORT_CHUNK_ROWS = 500
 
 
 @app.get("/api/export/csv")
@@ -371,51 +569,53 @@ async def export_csv(
     """Export dashboard data as CSV."""
     try:
         # Parse date parameters
-        start_dt = None
-        end_dt = None
-        
-        if start_date:
-            start_dt = datetime.datetime.strptime(start_date, "%Y-%m-%d")
-        if end_date:
-            end_dt = datetime.datetime.strptime(end_date, "%Y-%m-%d")
-        
-        data = generate_sample_data(start_dt, end_dt)
-        
-        # Create CSV content
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Write header
-        writer.writerow([
-            "Date", "Total Conversations", "Successful", "Failed", 
-            "Success Rate", "Avg Duration (ms)", "Avg Message Length", 
-            "Avg Response Length", "Unique Conversations"
-        ])
-        
-        # Write data
-        for day in data["business_metrics"]["daily_metrics"]:
-            writer.writerow([
-                day["date"],
-                day["total_conversations"],
-                day["successful_conversations"],
-                day["failed_conversations"],
-                f"{day['success_rate']:.2%}",
-                day["avg_duration"],
-                day["avg_message_length"],
-                day["avg_response_length"],
-                day["unique_conversations"]
-            ])
-        
-        # Return CSV file
-        output.seek(0)
+        start_dt = _parse_date(start_date)
+        end_dt = _parse_date(end_date)
+        
+        data = get_sample_data(start_dt, end_dt)
+        
+        daily_metrics = data["business_metrics"]["daily_metrics"]
+        
+        async def csv_rows():
+            # One small buffer, emptied after each row, so memory stays
+            # constant however long the date range is
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            
+            def flush() -> bytes:
+                chunk = buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate(0)
+                return chunk
+            
+            yield _CSV_EXPORT_HEADER
+            
+            # Write data, walking the columns in step; rows are written and
+            # flushed in chunks rather than one call and one yield per row
+            rows = zip(
+                daily_metrics["date"],
+                daily_metrics["total_conversations"],
+                daily_metrics["successful_conversations"],
+                daily_metrics["failed_conversations"],
+                map("{:.2%}".format, daily_metrics["success_rate"]),
+                daily_metrics["avg_duration"],
+                daily_metrics["avg_message_length"],
+                daily_metrics["avg_response_length"],
+                daily_metrics["unique_conversations"]
+            )
+            while chunk := list(islice(rows, CSV_EXPORT_CHUNK_ROWS)):
+                writer.writerows(chunk)
+                yield flush()
+        
+        # Stream the CSV file as it is written
         return StreamingResponse(
-            io.BytesIO(output.getvalue().encode()),
+            csv_rows(),
             media_type="text/csv",
             headers={"Content-Disposition": "attachment; filename=dashboard_export.csv"}
         )
         
     except Exception as e:
-        return JSONResponse(content={"error": str(e)}, status_code=500)
+        return ORJSONResponse(content={"error": str(e)}, status_code=500)
 
 
 @app.get("/api/export/pdf")
@@ -427,31 +627,19 @@ async def export_pdf(
     """Export dashboard data as PDF report."""
     try:
         # Parse date parameters
-        start_dt = None
-        end_dt = None
-        
-        if start_date:
-            start_dt = datetime.datetime.strptime(start_date, "%Y-%m-%d")
-        if end_date:
-            end_dt = datetime.datetime.strptime(end_date, "%Y-%m-%d")
+        start_dt = _parse_date(start_date)
+        end_dt = _parse_date(end_date)
         
-        data = generate_sample_data(start_dt, end_dt)
+        data = get_sample_data(start_dt, end_dt)
         
         # Create PDF
         buffer = io.BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=letter)
-        styles = getSampleStyleSheet()
+        styles = _PDF_STYLES
         story = []
         
         # Title
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            spaceAfter=30,
-            textColor=colors.HexColor(BRAND_COLORS["primary"])
-        )
-        story.append(Paragraph("Qwen Messaging Agent Analytics Report", title_style))
+        story.append(Paragraph("Qwen Messaging Agent Analytics Report", _PDF_TITLE_STYLE))
         story.append(Spacer(1, 12))
         
         # Date range
@@ -472,16 +660,7 @@ async def export_pdf(
         ]
         
         metrics_table = Table(metrics_data)
-        metrics_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor(BRAND_COLORS["primary"])),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 14),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        metrics_table.setStyle(_PDF_METRICS_TABLE_STYLE)
         
         story.append(metrics_table)
         story.append(Spacer(1, 20))
@@ -497,16 +676,17 @@ async def export_pdf(
         
         # Build PDF
         doc.build(story)
-        buffer.seek(0)
         
-        return StreamingResponse(
-            io.BytesIO(buffer.getvalue()),
+        # The report is already complete in memory: send its bytes as one
+        # body rather than re-wrapping them in a second stream
+        return Response(
+            content=buffer.getvalue(),
             media_type="application/pdf",
             headers={"Content-Disposition": "attachment; filename=dashboard_report.pdf"}
         )
         
     except Exception as e:
-        return JSONResponse(content={"error": str(e)}, status_code=500)
+        return ORJSONResponse(content={"error": str(e)}, status_code=500)
 
 
 @app.get("/api/drill-down/{metric}")
@@ -519,15 +699,10 @@ async def get_drill_down(
     """Get detailed drill-down data for a specific metric."""
     try:
         # Parse date parameters
-        start_dt = None
-        end_dt = None
-        
-        if start_date:
-            start_dt = datetime.datetime.strptime(start_date, "%Y-%m-%d")
-        if end_date:
-            end_dt = datetime.datetime.strptime(end_date, "%Y-%m-%d")
+        start_dt = _parse_date(start_date)
+        end_dt = _parse_date(end_date)
         
-        data = generate_sample_data(start_dt, end_dt)
+        data = get_sample_data(start_dt, end_dt)
         
         # Generate detailed breakdown based on metric
         if metric == "conversations":
@@ -554,27 +729,27 @@ async def get_drill_down(
         else:
             drill_data = {"error": "Unknown metric"}
         
-        return JSONResponse(content=drill_data)
+        return ORJSONResponse(content=drill_data)
         
     except Exception as e:
-        return JSONResponse(content={"error": str(e)}, status_code=500)
+        return ORJSONResponse(content={"error": str(e)}, status_code=500)
 
 
 @app.get("/api/alerts")
 async def get_alerts(username: str = Depends(verify_credentials)):
     """Get current alert status."""
     try:
-        data = generate_sample_data()
+        data = get_sample_data()
         alerts = check_alerts(data)
-        return JSONResponse(content={"alerts": alerts, "thresholds": ALERT_THRESHOLDS})
+        return ORJSONResponse(content={"alerts": alerts, "thresholds": ALERT_THRESHOLDS})
     except Exception as e:
-        return JSONResponse(content={"error": str(e)}, status_code=500)
+        return ORJSONResponse(content={"error": str(e)}, status_code=500)
 
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    return {"status": "healthy", "timestamp": datetime.datetime.utcnow().isoformat()}
+    return {"status": "healthy", "timestamp": _now_iso()}
 
 
 if __name__ == "__main__":
@@ -583,6 +758,7 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--port", type=int, default=8080, help="Port to run the server on")
     parser.add_argument("--host", type=str, default="127.0.0.1", help="Host to bind to")
+    parser.add_argument("--dev", action="store_true", help="Reload on code changes")
     args = parser.parse_args()
     
     print(f"🚀 Starting Qwen Messaging Agent Analytics Dashboard")
@@ -602,4 +778,13 @@ if __name__ == "__main__":
     print(f"   - Top conversation topics")
     print(f"   - Auto-refresh every 5 minutes")
     
-    uvicorn.run(app, host=args.host, port=args.port, reload=True)
+    # Single process: WebSocket clients and the sample-data cache live in
+    # this process's memory. "auto" picks uvloop/httptools when installed.
+    uvicorn.run(
+        "simple_dashboard:app" if args.dev else app,
+        host=args.host,
+        port=args.port,
+        reload=args.dev,
+        loop="auto",
+        http="auto"
+    )
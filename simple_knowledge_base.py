@@ -3,16 +3,110 @@ Simple Knowledge Base Setup for Ticket Information
 This script helps you create and organize ticket data for your RAG system
 """
 
+import codecs
 import os
 import json
 import csv
-from typing import List, Dict, Any, Optional
+import heapq
+import re
+from bisect import bisect_right
+from collections import Counter, defaultdict
+from operator import itemgetter
+from typing import List, Dict, Any, Generator, Iterable, Iterator, Optional, Set, Tuple
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+try:
+    import ijson
+    HAS_IJSON = True
+except ImportError:
+    HAS_IJSON = False
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+_WORD_RE = re.compile(r'\S+')
+
+# Query words whose matches are remembered between searches
+MATCH_CACHE_SIZE = 1024
+
+# Characters read from a plain text file at a time while chunking it
+TEXT_READ_SIZE = 65536
+
+
+# Built-in sample documents; create_sample_ticket_data hands out copies
+_SAMPLE_TICKET_DOCS = (
+    {
+        "id": "lakers-pricing-1",
+        "content": "Lakers vs Warriors - March 15, 2024 - Crypto.com Arena. Lower bowl seats: $150-300, Upper bowl: $50-120, Courtside: $800-2000. Game time: 7:30 PM PST.",
+        "source": "ticket_pricing",
+        "category": "pricing"
+    },
+    {
+        "id": "lakers-pricing-2", 
+        "content": "Lakers vs Celtics - March 20, 2024 - Crypto.com Arena. Lower bowl seats: $180-350, Upper bowl: $60-140, Courtside: $900-2200. Game time: 7:00 PM PST.",
+        "source": "ticket_pricing",
+        "category": "pricing"
+    },
+    {
+        "id": "upgrade-policy-1",
+        "content": "Seat upgrades available up to 2 hours before game time. Upgrade cost is the difference between current seat price and new seat price plus $25 processing fee. Upgrades subject to availability.",
+        "source": "upgrade_policy",
+        "category": "upgrades"
+    },
+    {
+        "id": "refund-policy-1",
+        "content": "Full refunds available up to 48 hours before game time. Partial refunds (75%) available 24-48 hours before. No refunds within 24 hours of game time. Exchanges may be available for a $15 fee.",
+        "source": "refund_policy",
+        "category": "refunds"
+    },
+    {
+        "id": "parking-info-1",
+        "content": "Crypto.com Arena parking: General parking $25-40, Premium parking $50-75, Valet parking $60-80. Parking opens 2 hours before game time. Limited street parking available.",
+        "source": "parking_info",
+        "category": "parking"
+    },
+    {
+        "id": "concessions-1",
+        "content": "Arena concessions: Beer $12-15, Soft drinks $6-8, Hot dogs $8-12, Pizza $15-20, Nachos $10-14. Premium dining options available in club sections.",
+        "source": "concessions",
+        "category": "food"
+    },
+    {
+        "id": "seating-chart-1",
+        "content": "Crypto.com Arena seating: Lower bowl sections 101-130 (closest to court), Upper bowl sections 301-330 (higher up), Club sections 200s (premium amenities), Courtside rows A-F (VIP experience).",
+        "source": "seating_info",
+        "category": "seating"
+    },
+    {
+        "id": "team-stats-1",
+        "content": "Lakers 2023-24 season: 45-25 record, 3rd in Western Conference. LeBron James averaging 25.2 points, Anthony Davis 24.8 points. Home record: 28-8, Away record: 17-17.",
+        "source": "team_stats",
+        "category": "statistics"
+    }
+)
+
 
 class SimpleKnowledgeBaseBuilder:
     """Build and manage knowledge base for ticket information."""
     
     def __init__(self):
-        pass
+        # Search index over the most recently searched documents list
+        self._index: Dict[str, Set[int]] = {}
+        self._term_docs: List[Set[int]] = []
+        self._term_starts: List[int] = []
+        self._vocab_text = ""
+        self._word_matches: Dict[str, Set[int]] = {}
+        self._match_columns: Dict[str, Any] = {}
+        # Content strings the index was built from, to detect any change
+        self._indexed_contents: Optional[List[str]] = None
     
     def process_ticket_data(self, data_source: str) -> List[Dict[str, Any]]:
         """Process ticket data from various sources."""
@@ -30,20 +124,63 @@ class SimpleKnowledgeBaseBuilder:
         return documents
     
     def _process_json_data(self, file_path: str) -> List[Dict[str, Any]]:
-        """Process JSON ticket data."""
-        with open(file_path, 'r') as f:
-            data = json.load(f)
+        """
+        Process JSON ticket data.
+        
+        With ijson installed, top-level items are parsed one at a time, so
+        the whole file is never held as one Python object tree.
+        """
+        if HAS_IJSON:
+            try:
+                with open(file_path, 'rb') as f:
+                    streamed = self._stream_json(f)
+                    if streamed is not None:
+                        return self._documents_from_json(*streamed)
+            except ijson.JSONError:
+                # use_float can't hold integers beyond 64 bits; json.load can
+                pass
+        
+        # json.loads detects the UTF encoding of raw bytes and decodes once
+        with open(file_path, 'rb') as f:
+            data = json.loads(f.read())
+        
+        if isinstance(data, list):
+            return self._documents_from_json(data, None)
+        if isinstance(data, dict):
+            return self._documents_from_json(None, data.items())
+        return []
+    
+    def _stream_json(self, f) -> Optional[tuple]:
+        """
+        Return (items, None) or (None, key/value pairs) iterating a binary JSON file.
         
+        Returns None unless the file starts with a list or object, leaving
+        BOM-prefixed, scalar, empty and malformed files to json.loads.
+        """
+        # Peek at the first non-whitespace byte to tell a list from an object
+        while (first := f.read(1)).isspace():
+            pass
+        f.seek(0)
+        
+        # use_float keeps numbers as floats, matching json.load
+        if first == b'[':
+            return ijson.items(f, 'item', use_float=True), None
+        if first == b'{':
+            return None, ijson.kvitems(f, '', use_float=True)
+        return None
+    
+    def _documents_from_json(self, items, key_values) -> List[Dict[str, Any]]:
+        """Create documents from top-level list items or object key/value pairs."""
         documents = []
         
         # Handle different JSON structures
-        if isinstance(data, list):
-            for i, item in enumerate(data):
+        if items is not None:
+            for i, item in enumerate(items):
                 doc = self._create_document_from_dict(item, f"json_item_{i}")
                 documents.append(doc)
-        elif isinstance(data, dict):
+        elif key_values is not None:
             # Handle nested structures
-            for key, value in data.items():
+            for key, value in key_values:
                 if isinstance(value, (dict, list)):
                     doc = self._create_document_from_dict(value, f"json_{key}")
                     documents.append(doc)
@@ -59,61 +196,78 @@ class SimpleKnowledgeBaseBuilder:
         return documents
     
     def _process_csv_data(self, file_path: str) -> List[Dict[str, Any]]:
-        """Process CSV ticket data."""
-        documents = []
+        """
+        Process CSV ticket data.
         
+        Rows come straight from csv.reader as lists and are joined against
+        precomputed "column: " prefixes, with the same content DictReader
+        rows would give but no per-row dict.
+        """
         with open(file_path, 'r') as f:
-            reader = csv.DictReader(f)
-            for i, row in enumerate(reader):
-                # Create content from all columns
-                content_parts = []
-                for key, value in row.items():
-                    if value and str(value).strip():
-                        content_parts.append(f"{key}: {value}")
-                
-                content = " | ".join(content_parts)
-                
-                doc = {
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                return []
+            
+            if len(set(header)) == len(header):
+                prefixes = [f"{key}: " for key in header]
+                width = len(header)
+                # Rows are joined inline; only overlong ones pay for the call
+                # that files their extra cells
+                rows = (
+                    content if len(row) <= width else self._csv_row_content(content, row[width:])
+                    for row in reader if row
+                    for content in (" | ".join([prefix + value for prefix, value in zip(prefixes, row) if value.strip()]),)
+                )
+            else:
+                # Repeated column names collapse the way DictReader rows do
+                rows = (
+                    " | ".join(f"{key}: {value}" for key, value in row.items() if value and str(value).strip())
+                    for row in csv.DictReader(f, fieldnames=header)
+                )
+            
+            return [
+                {
                     "id": f"csv_row_{i}",
                     "content": content,
                     "source": "ticket_data",
                     "category": "ticket_info"
                 }
-                documents.append(doc)
-        
-        return documents
+                for i, content in enumerate(rows)
+            ]
+    
+    @staticmethod
+    def _csv_row_content(content: str, extra: List[str]) -> str:
+        """Append a CSV row's cells beyond the header to its joined content."""
+        # They go together under "None", where DictReader files them
+        return f"{content} | None: {extra}" if content else f"None: {extra}"
     
     def _process_text_data(self, file_path: str) -> List[Dict[str, Any]]:
-        """Process plain text ticket data."""
-        with open(file_path, 'r') as f:
-            content = f.read()
-        
-        # Split into chunks (you can customize this logic)
-        chunks = self._split_text_into_chunks(content, chunk_size=500)
-        
-        documents = []
-        for i, chunk in enumerate(chunks):
-            doc = {
-                "id": f"text_chunk_{i}",
-                "content": chunk,
-                "source": "ticket_data",
-                "category": "general"
-            }
-            documents.append(doc)
-        
-        return documents
+        """Process plain text ticket data, reading the file a window at a time."""
+        with open(file_path, 'rb') as f:
+            # Decode raw windows directly; text mode's newline translation
+            # buys nothing when lines are split on whitespace anyway
+            pieces = codecs.iterdecode(iter(lambda: f.read(TEXT_READ_SIZE), b''), 'utf-8')
+            
+            # Split into chunks (you can customize this logic)
+            chunks = self._split_text_into_chunks(pieces, chunk_size=500)
+            
+            return [
+                {
+                    "id": f"text_chunk_{i}",
+                    "content": chunk,
+                    "source": "ticket_data",
+                    "category": "general"
+                }
+                for i, chunk in enumerate(chunks)
+            ]
     
     def _create_document_from_dict(self, data: Dict[str, Any], base_id: str) -> Dict[str, Any]:
         """Create a document from a dictionary."""
-        content_parts = []
-        
-        for key, value in data.items():
-            if isinstance(value, (dict, list)):
-                content_parts.append(f"{key}: {json.dumps(value)}")
-            else:
-                content_parts.append(f"{key}: {value}")
-        
-        content = " | ".join(content_parts)
+        content = " | ".join([
+            f"{key}: {json.dumps(value) if isinstance(value, (dict, list)) else value}"
+            for key, value in data.items()
+        ])
         
         return {
             "id": base_id,
@@ -122,102 +276,176 @@ class SimpleKnowledgeBaseBuilder:
             "category": "ticket_info"
         }
     
-    def _split_text_into_chunks(self, text: str, chunk_size: int = 500) -> List[str]:
-        """Split text into manageable chunks."""
-        words = text.split()
-        chunks = []
-        current_chunk = []
-        current_length = 0
+    def _split_text_into_chunks(self, pieces: Iterable[str], chunk_size: int = 500) -> Iterator[str]:
+        """
+        Split streamed text into manageable chunks.
         
-        for word in words:
-            if current_length + len(word) + 1 > chunk_size and current_chunk:
-                chunks.append(" ".join(current_chunk))
-                current_chunk = [word]
-                current_length = len(word)
-            else:
-                current_chunk.append(word)
-                current_length += len(word) + 1
+        pieces can be any run of text windows, such as fixed-size file
+        reads. Each window is scanned at word boundaries and chunks are
+        sliced out of it by offset; only the text of the unfinished chunk
+        is carried into the next window.
+        """
+        carry = ""
+        resume = current_length = 0
+        for piece in pieces:
+            text = carry + piece
+            chunk_start, resume, current_length = yield from self._chunk_window(
+                text, chunk_size, resume, current_length, final=False
+            )
+            carry = text[chunk_start:]
+            resume -= chunk_start
+        if carry:
+            yield from self._chunk_window(carry, chunk_size, resume, current_length, final=True)
+    
+    @staticmethod
+    def _chunk_window(
+        text: str, chunk_size: int, resume: int, current_length: int, final: bool
+    ) -> Generator[str, None, Tuple[int, int, int]]:
+        """
+        Yield the complete chunks in text, scanning words from resume.
         
-        if current_chunk:
-            chunks.append(" ".join(current_chunk))
+        A non-zero current_length means text opens with an unfinished chunk
+        of that length. Unless final, the last chunk is left unfinished along
+        with any word running into the end of text; returns where it starts,
+        where to resume scanning and its length so far.
+        """
+        chunk_start = 0 if current_length else None
+        chunk_end = resume
         
-        return chunks
+        for match in _WORD_RE.finditer(text, resume):
+            word_start, word_end = match.span()
+            if word_end == len(text) and not final:
+                if chunk_start is None:
+                    return word_start, word_start, 0
+                return chunk_start, word_start, current_length
+            word_length = word_end - word_start
+            if current_length + word_length + 1 > chunk_size and chunk_start is not None:
+                # Collapse inner whitespace runs to single spaces
+                yield " ".join(text[chunk_start:chunk_end].split())
+                chunk_start = word_start
+                current_length = word_length
+            else:
+                if chunk_start is None:
+                    chunk_start = word_start
+                current_length += word_length + 1
+            chunk_end = word_end
+        
+        if final and chunk_start is not None:
+            yield " ".join(text[chunk_start:chunk_end].split())
+        if chunk_start is None:
+            return len(text), len(text), 0
+        return chunk_start, len(text), current_length
     
     def create_sample_ticket_data(self) -> List[Dict[str, Any]]:
         """Create sample ticket data for testing."""
-        return [
-            {
-                "id": "lakers-pricing-1",
-                "content": "Lakers vs Warriors - March 15, 2024 - Crypto.com Arena. Lower bowl seats: $150-300, Upper bowl: $50-120, Courtside: $800-2000. Game time: 7:30 PM PST.",
-                "source": "ticket_pricing",
-                "category": "pricing"
-            },
-            {
-                "id": "lakers-pricing-2", 
-                "content": "Lakers vs Celtics - March 20, 2024 - Crypto.com Arena. Lower bowl seats: $180-350, Upper bowl: $60-140, Courtside: $900-2200. Game time: 7:00 PM PST.",
-                "source": "ticket_pricing",
-                "category": "pricing"
-            },
-            {
-                "id": "upgrade-policy-1",
-                "content": "Seat upgrades available up to 2 hours before game time. Upgrade cost is the difference between current seat price and new seat price plus $25 processing fee. Upgrades subject to availability.",
-                "source": "upgrade_policy",
-                "category": "upgrades"
-            },
-            {
-                "id": "refund-policy-1",
-                "content": "Full refunds available up to 48 hours before game time. Partial refunds (75%) available 24-48 hours before. No refunds within 24 hours of game time. Exchanges may be available for a $15 fee.",
-                "source": "refund_policy",
-                "category": "refunds"
-            },
-            {
-                "id": "parking-info-1",
-                "content": "Crypto.com Arena parking: General parking $25-40, Premium parking $50-75, Valet parking $60-80. Parking opens 2 hours before game time. Limited street parking available.",
-                "source": "parking_info",
-                "category": "parking"
-            },
-            {
-                "id": "concessions-1",
-                "content": "Arena concessions: Beer $12-15, Soft drinks $6-8, Hot dogs $8-12, Pizza $15-20, Nachos $10-14. Premium dining options available in club sections.",
-                "source": "concessions",
-                "category": "food"
-            },
-            {
-                "id": "seating-chart-1",
-                "content": "Crypto.com Arena seating: Lower bowl sections 101-130 (closest to court), Upper bowl sections 301-330 (higher up), Club sections 200s (premium amenities), Courtside rows A-F (VIP experience).",
-                "source": "seating_info",
-                "category": "seating"
-            },
-            {
-                "id": "team-stats-1",
-                "content": "Lakers 2023-24 season: 45-25 record, 3rd in Western Conference. LeBron James averaging 25.2 points, Anthony Davis 24.8 points. Home record: 28-8, Away record: 17-17.",
-                "source": "team_stats",
-                "category": "statistics"
-            }
-        ]
+        return [dict(doc) for doc in _SAMPLE_TICKET_DOCS]
     
     def save_documents_to_file(self, documents: List[Dict[str, Any]], output_file: str):
         """Save processed documents to a file."""
-        with open(output_file, 'w') as f:
-            json.dump(documents, f, indent=2)
+        if HAS_ORJSON:
+            with open(output_file, 'wb') as f:
+                f.write(orjson.dumps(documents, option=orjson.OPT_INDENT_2))
+        else:
+            with open(output_file, 'w') as f:
+                json.dump(documents, f, indent=2)
         
         print(f"✅ Saved {len(documents)} documents to {output_file}")
     
     def search_documents(self, documents: List[Dict[str, Any]], query: str, top_k: int = 3) -> List[Dict[str, Any]]:
-        """Simple keyword-based search for testing."""
+        """
+        Simple keyword-based search for testing.
+        
+        A document scores one point per query word found anywhere in its
+        content. Matching goes through an index over the distinct
+        whitespace-separated terms of the corpus, so each query word is
+        checked against the vocabulary once instead of against every
+        document's content. The index is rebuilt whenever any document's
+        content differs from what it was built from.
+        """
+        # List equality short-circuits on identical strings, so an unchanged
+        # corpus costs one C-level pass rather than a re-tokenize
+        contents = list(map(itemgetter("content"), documents))
+        if contents != self._indexed_contents:
+            self._build_index(contents)
+        
         query_words = query.lower().split()
-        scored_docs = []
         
-        for doc in documents:
-            content = doc["content"].lower()
-            score = sum(1 for word in query_words if word in content)
+        if HAS_NUMPY:
+            # Each word's matches are a boolean column over all documents, so
+            # scoring is one vector add per word instead of per-document work
+            scores = np.zeros(len(documents), dtype=np.int32)
+            for word in query_words:
+                scores += self._match_column(word)
             
-            if score > 0:
-                scored_docs.append((score, doc))
+            # Highest score first; the stable sort keeps document order on ties
+            top = np.argsort(-scores, kind="stable")[:top_k]
+            return [documents[doc_idx] for doc_idx in top.tolist() if scores[doc_idx] > 0]
+        
+        scores = Counter()
+        for word in query_words:
+            scores.update(self._docs_containing(word))
+        
+        # Highest score first; ties keep document order
+        top = heapq.nsmallest(top_k, scores.items(), key=lambda item: (-item[1], item[0]))
+        return [documents[doc_idx] for doc_idx, _ in top]
+    
+    def _build_index(self, contents: List[str]):
+        """Index each distinct lowercased term to the documents containing it."""
+        index = defaultdict(set)
+        for doc_idx, content in enumerate(contents):
+            for term in content.lower().split():
+                index[term].add(doc_idx)
+        
+        self._index = dict(index)
+        
+        # All terms in one newline-separated string, so finding the terms
+        # that contain a word is a C-level str.find scan rather than a
+        # Python loop over the vocabulary. Query words hold no whitespace,
+        # so a hit never spans two terms.
+        self._term_docs = list(self._index.values())
+        self._term_starts = []
+        offset = 0
+        for term in self._index:
+            self._term_starts.append(offset)
+            offset += len(term) + 1
+        self._vocab_text = "\n".join(self._index)
         
-        # Sort by score and return top_k
-        scored_docs.sort(key=lambda x: x[0], reverse=True)
-        return [doc for score, doc in scored_docs[:top_k]]
+        self._word_matches = {}
+        self._match_columns = {}
+        self._indexed_contents = contents
+    
+    def _docs_containing(self, word: str) -> Set[int]:
+        """Documents whose content contains word as a substring."""
+        # A query word has no whitespace, so it occurs in the content exactly
+        # when it occurs inside one of its whitespace-separated terms
+        matches = self._word_matches.get(word)
+        if matches is None:
+            matches = set()
+            vocab_text = self._vocab_text
+            term_starts = self._term_starts
+            pos = vocab_text.find(word)
+            while pos != -1:
+                term_idx = bisect_right(term_starts, pos) - 1
+                matches |= self._term_docs[term_idx]
+                # Resume at the next term; one hit per term is enough
+                if term_idx + 1 == len(term_starts):
+                    break
+                pos = vocab_text.find(word, term_starts[term_idx + 1])
+            if len(self._word_matches) >= MATCH_CACHE_SIZE:
+                self._word_matches.clear()
+            self._word_matches[word] = matches
+        return matches
+    
+    def _match_column(self, word: str) -> "np.ndarray":
+        """Boolean vector over the indexed documents marking those containing word."""
+        column = self._match_columns.get(word)
+        if column is None:
+            column = np.zeros(len(self._indexed_contents), dtype=np.bool_)
+            column[list(self._docs_containing(word))] = True
+            if len(self._match_columns) >= MATCH_CACHE_SIZE:
+                self._match_columns.clear()
+            self._match_columns[word] = column
+        return column
 
 
 def create_sample_ticket_files():
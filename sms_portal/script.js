@@ -3,6 +3,7 @@
 // WebSocket connection
 let ws = null;
 let messageHistory = [];
+const wsDecoder = new TextDecoder();
 
 // Initialize
 document.addEventListener('DOMContentLoaded', () => {
@@ -16,6 +17,8 @@ document.addEventListener('DOMContentLoaded', () => {
 function initializeWebSocket() {
     const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
     ws = new WebSocket(`${protocol}//${window.location.host}/ws`);
+    // Server sends JSON as binary frames
+    ws.binaryType = 'arraybuffer';
     
     ws.onopen = () => {
         console.log('✅ Connected to SMS Portal');
@@ -23,7 +26,10 @@ function initializeWebSocket() {
     };
     
     ws.onmessage = (event) => {
-        const data = JSON.parse(event.data);
+        const text = event.data instanceof ArrayBuffer
+            ? wsDecoder.decode(event.data)
+            : event.data;
+        const data = JSON.parse(text);
         handleWebSocketMessage(data);
     };
     
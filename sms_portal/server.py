@@ -8,12 +8,27 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Set
 from datetime import datetime, timedelta
-import json
 import asyncio
 from collections import deque
+from functools import lru_cache
+from pathlib import Path
+import importlib.util
 import os
+import sys
+
+try:
+    from json_utils import ORJSONResponse, json_dumps_bytes
+except ImportError:
+    # Run as a script from sms_portal/: load json_utils from the repository
+    # root by path, without putting the root on sys.path
+    _spec = importlib.util.spec_from_file_location(
+        "json_utils", Path(__file__).resolve().parent.parent / "json_utils.py"
+    )
+    _json_utils = sys.modules["json_utils"] = importlib.util.module_from_spec(_spec)
+    _spec.loader.exec_module(_json_utils)
+    ORJSONResponse, json_dumps_bytes = _json_utils.ORJSONResponse, _json_utils.json_dumps_bytes
 
 # Import SMS manager (with graceful fallback)
 try:
@@ -23,14 +38,17 @@ except ImportError:
     TWILIO_AVAILABLE = False
     print("⚠️  Twilio not available - using mock SMS manager")
 
+
 # Mock SMS manager for testing without Twilio
 class MockSMSManager:
     def __init__(self):
         self.messages = deque(maxlen=100)  # Keep last 100 messages
+        # The same messages per recipient, oldest first
+        self._by_phone: Dict[str, deque] = {}
     
     def send_sms(self, to: str, body: str):
         """Mock SMS sending."""
-        msg_id = f"SM{'mock' + str(len(self.messages)):06d}"
+        msg_id = f"SMmock{len(self.messages):06d}"
         message = {
             "sid": msg_id,
             "to": to,
@@ -40,7 +58,14 @@ class MockSMSManager:
             "sent_at": datetime.now().isoformat(),
             "price": "0.00"
         }
+        if len(self.messages) == self.messages.maxlen:
+            # The message about to fall out is its recipient's oldest too
+            evicted = self.messages[0]["to"]
+            self._by_phone[evicted].popleft()
+            if not self._by_phone[evicted]:
+                del self._by_phone[evicted]
         self.messages.append(message)
+        self._by_phone.setdefault(to, deque()).append(message)
         return type('obj', (object,), message)()
     
     def get_stats(self):
@@ -55,10 +80,22 @@ class MockSMSManager:
     def get_messages(self, limit=50):
         """Get recent messages."""
         return list(self.messages)[-limit:]
+    
+    def get_customers(self):
+        """Phone numbers among recent messages."""
+        return [phone for phone in self._by_phone if phone]
+    
+    def get_customer_messages(self, phone: str, limit: Optional[int] = None):
+        """Recent messages to one phone number, oldest first."""
+        return list(self._by_phone.get(phone, ()))[:limit]
 
 
 # Initialize FastAPI app
-app = FastAPI(title="SMS Portal", description="Testing and monitoring portal for SMS")
+app = FastAPI(
+    title="SMS Portal",
+    description="Testing and monitoring portal for SMS",
+    default_response_class=ORJSONResponse
+)
 
 # CORS middleware
 app.add_middleware(
@@ -70,7 +107,12 @@ app.add_middleware(
 )
 
 # Store active websocket connections
-active_connections: List[WebSocket] = []
+active_connections: Set[WebSocket] = set()
+
+# Seconds between stats pushes to WebSocket clients
+STATS_INTERVAL_SECONDS = 5
+
+_stats_task: Optional[asyncio.Task] = None
 
 # Request models
 class SendSMSRequest(BaseModel):
@@ -90,22 +132,92 @@ if TWILIO_AVAILABLE:
 else:
     sms_manager = MockSMSManager()
 
+# Message history lookups, resolved once for the manager in use; the
+# Twilio manager keeps no local history, so those endpoints return nothing
+if hasattr(sms_manager, 'get_messages'):
+    _get_messages = sms_manager.get_messages
+elif hasattr(sms_manager, 'messages'):
+    def _get_messages(limit: int) -> List[Dict[str, Any]]:
+        return list(sms_manager.messages)[-limit:]
+else:
+    def _get_messages(limit: int) -> List[Dict[str, Any]]:
+        return []
+
+if hasattr(sms_manager, 'get_customer_messages'):
+    _get_customers = sms_manager.get_customers
+    _get_customer_messages = sms_manager.get_customer_messages
+else:
+    def _get_customers() -> List[str]:
+        return []
+    
+    def _get_customer_messages(phone: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        return []
+
 
 # Broadcast to all connected WebSocket clients
 async def broadcast(message: Dict[str, Any]):
     """Broadcast message to all connected WebSocket clients."""
-    for connection in active_connections:
-        try:
-            await connection.send_json(message)
-        except:
-            pass  # Connection closed
+    if active_connections:
+        # Encode once for every client; frames go out as binary JSON
+        await broadcast_bytes(json_dumps_bytes(message))
+
+
+async def broadcast_bytes(payload: bytes):
+    """Broadcast an already-encoded JSON message to all connected clients."""
+    connections = list(active_connections)
+    
+    # Send concurrently so one slow client does not hold up the rest
+    results = await asyncio.gather(
+        *(connection.send_bytes(payload) for connection in connections),
+        return_exceptions=True
+    )
+    
+    # Drop connections that have closed
+    for connection, result in zip(connections, results):
+        if isinstance(result, Exception):
+            active_connections.discard(connection)
+
+
+def _stats_message() -> bytes:
+    return json_dumps_bytes({
+        "type": "stats",
+        "data": sms_manager.get_stats()
+    })
+
+
+async def _stats_pump():
+    """Push stats to every client, computed and encoded once per interval."""
+    while True:
+        await asyncio.sleep(STATS_INTERVAL_SECONDS)
+        if active_connections:
+            await broadcast_bytes(_stats_message())
+
+
+@app.on_event("startup")
+async def start_stats_pump():
+    """Start the shared stats updates."""
+    global _stats_task
+    _stats_task = asyncio.create_task(_stats_pump())
+
+
+@app.on_event("shutdown")
+async def stop_stats_pump():
+    """Stop the shared stats updates."""
+    if _stats_task:
+        _stats_task.cancel()
+
+
+@lru_cache(maxsize=1)
+def _load_portal_html() -> bytes:
+    """Read the portal page once."""
+    return Path("sms_portal/index.html").read_bytes()
 
 
 @app.get("/", response_class=HTMLResponse)
 async def portal():
     """Serve the SMS portal dashboard."""
-    with open("sms_portal/index.html", "r") as f:
-        return f.read()
+    # Let browsers reuse the page briefly instead of refetching every load
+    return HTMLResponse(content=_load_portal_html(), headers={"Cache-Control": "public, max-age=60"})
 
 
 # Mount static files (CSS, JS)
@@ -122,11 +234,7 @@ async def get_stats():
 @app.get("/api/messages")
 async def get_messages(limit: int = 50, phone: Optional[str] = None):
     """Get recent SMS messages."""
-    if hasattr(sms_manager, 'get_messages'):
-        messages = sms_manager.get_messages(limit)
-    else:
-        # Fallback for mock
-        messages = list(sms_manager.messages)[-limit:] if hasattr(sms_manager, 'messages') else []
+    messages = _get_messages(limit)
     
     # Filter by phone if provided
     if phone:
@@ -146,7 +254,7 @@ async def send_test_sms(request: SendSMSRequest):
         await broadcast({
             "type": "new_message",
             "data": {
-                "sid": result.sid if hasattr(result, 'sid') else "unknown",
+                "sid": getattr(result, 'sid', 'unknown'),
                 "to": request.to,
                 "body": request.body,
                 "status": getattr(result, 'status', 'sent'),
@@ -154,17 +262,18 @@ async def send_test_sms(request: SendSMSRequest):
             }
         })
         
-        return {
+        # Plain strings only, so the response skips FastAPI's jsonable_encoder pass
+        return ORJSONResponse(content={
             "success": True,
             "sid": getattr(result, 'sid', 'unknown'),
             "status": getattr(result, 'status', 'sent'),
             "message": "SMS sent successfully"
-        }
+        })
     except Exception as e:
-        return {
+        return ORJSONResponse(content={
             "success": False,
             "error": str(e)
-        }
+        })
 
 
 @app.post("/api/send/confirmation")
@@ -221,17 +330,10 @@ async def send_reminder_sms(to: str, game: str, date: str, time: str):
 @app.get("/api/customers")
 async def get_customers():
     """Get list of customers (from SMS history)."""
-    messages = sms_manager.get_messages(100) if hasattr(sms_manager, 'get_messages') else []
-    
-    # Extract unique phone numbers
-    customers = set()
-    for msg in messages:
-        to = msg.get('to', '') or msg.get('To', '')
-        if to:
-            customers.add(to)
+    customers = _get_customers()
     
     return {
-        "customers": list(customers),
+        "customers": customers,
         "count": len(customers)
     }
 
@@ -239,13 +341,7 @@ async def get_customers():
 @app.get("/api/customer/{phone}/history")
 async def get_customer_history(phone: str, limit: int = 20):
     """Get SMS history for a specific customer."""
-    messages = sms_manager.get_messages(100) if hasattr(sms_manager, 'get_messages') else []
-    
-    # Filter by phone number
-    customer_messages = [
-        msg for msg in messages
-        if msg.get('to') == phone or msg.get('To') == phone
-    ][:limit]
+    customer_messages = _get_customer_messages(phone, limit)
     
     return {
         "phone": phone,
@@ -257,22 +353,17 @@ async def get_customer_history(phone: str, limit: int = 20):
 @app.get("/api/customer/{phone}/stats")
 async def get_customer_stats(phone: str):
     """Get statistics for a specific customer."""
-    messages = sms_manager.get_messages(100) if hasattr(sms_manager, 'get_messages') else []
+    customer_messages = _get_customer_messages(phone)
     
-    # Filter by phone number
-    customer_messages = [
-        msg for msg in messages
-        if msg.get('to') == phone or msg.get('To') == phone
-    ]
+    # sent_at comes from datetime.isoformat(), so its first ten characters
+    # are the ISO date and can be compared without parsing
+    today = datetime.now().date().isoformat()
     
     return {
         "phone": phone,
         "total_messages": len(customer_messages),
         "last_message": customer_messages[-1] if customer_messages else None,
-        "messages_today": len([
-            msg for msg in customer_messages
-            if datetime.fromisoformat(msg.get('sent_at', '')).date() == datetime.now().date()
-        ])
+        "messages_today": sum(1 for msg in customer_messages if msg.get('sent_at', '')[:10] == today)
     }
 
 
@@ -280,24 +371,17 @@ async def get_customer_stats(phone: str):
 async def websocket_endpoint(websocket: WebSocket):
     """WebSocket endpoint for real-time updates."""
     await websocket.accept()
-    active_connections.append(websocket)
+    active_connections.add(websocket)
     
     try:
-        # Send initial stats
-        await websocket.send_json({
-            "type": "stats",
-            "data": sms_manager.get_stats()
-        })
+        # Send initial stats; periodic updates come from _stats_pump
+        await websocket.send_bytes(_stats_message())
         
-        # Keep connection alive and send periodic updates
         while True:
-            await asyncio.sleep(5)  # Update every 5 seconds
-            await websocket.send_json({
-                "type": "stats",
-                "data": sms_manager.get_stats()
-            })
+            # Keep connection alive
+            await websocket.receive_text()
     except WebSocketDisconnect:
-        active_connections.remove(websocket)
+        active_connections.discard(websocket)
 
 
 @app.get("/health")
@@ -321,4 +405,5 @@ if __name__ == "__main__":
     print("  ✅ Real-time Updates")
     print("  ✅ Message History")
     print("  ✅ Statistics Dashboard")
-    uvicorn.run(app, host="0.0.0.0", port=8080, log_level="info")
+    # "auto" picks uvloop and httptools when installed (uvicorn[standard])
+    uvicorn.run(app, host="0.0.0.0", port=8080, log_level="info", loop="auto", http="auto")
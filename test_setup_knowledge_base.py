@@ -0,0 +1,45 @@
+"""
+Test Suite for the Vertex AI Knowledge Base Builder
+"""
+
+import json
+from unittest.mock import patch
+
+import pytest
+
+import setup_knowledge_base
+
+
+@pytest.fixture
+def builder():
+    """A builder whose embedding model is never loaded"""
+    with patch.object(setup_knowledge_base.TextEmbeddingModel, "from_pretrained"):
+        return setup_knowledge_base.KnowledgeBaseBuilder(project_id="test-project")
+
+
+class TestSaveDocumentsToFile:
+    """Tests for KnowledgeBaseBuilder.save_documents_to_file"""
+    
+    def test_writes_json_array(self, builder, tmp_path):
+        """Streamed documents are written as an indented JSON array"""
+        output = tmp_path / "knowledge_base.json"
+        docs = [{"id": "a", "content": "x"}, {"id": "b", "content": "y"}]
+        assert builder.save_documents_to_file(iter(docs), str(output)) == 2
+        assert json.loads(output.read_text()) == docs
+        assert builder.save_documents_to_file(iter([]), str(output)) == 0
+        assert json.loads(output.read_text()) == []
+        assert [p.name for p in tmp_path.iterdir()] == ["knowledge_base.json"]
+    
+    def test_failure_keeps_previous_file(self, builder, tmp_path):
+        """A stream that fails partway leaves the earlier output untouched"""
+        output = tmp_path / "knowledge_base.json"
+        output.write_text('[{"id": "old"}]')
+        
+        def documents():
+            yield {"id": "new"}
+            raise FileNotFoundError("tickets.csv")
+        
+        with pytest.raises(FileNotFoundError):
+            builder.save_documents_to_file(documents(), str(output))
+        assert output.read_text() == '[{"id": "old"}]'
+        assert [p.name for p in tmp_path.iterdir()] == ["knowledge_base.json"]
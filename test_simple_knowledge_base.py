@@ -0,0 +1,118 @@
+"""
+Test Suite for the Simple Knowledge Base
+"""
+
+import json
+
+import pytest
+
+import simple_knowledge_base
+from simple_knowledge_base import SimpleKnowledgeBaseBuilder
+
+
+@pytest.fixture(params=[True, False], ids=["ijson", "json"])
+def builder(request, monkeypatch):
+    """A builder run with and without the ijson streaming path"""
+    if request.param and not simple_knowledge_base.HAS_IJSON:
+        pytest.skip("ijson not installed")
+    monkeypatch.setattr(simple_knowledge_base, "HAS_IJSON", request.param)
+    return SimpleKnowledgeBaseBuilder()
+
+
+class TestProcessJsonData:
+    """Tests for SimpleKnowledgeBaseBuilder._process_json_data"""
+    
+    def test_list_and_object(self, builder, tmp_path):
+        """Lists give one document per item, objects one per key"""
+        path = tmp_path / "tickets.json"
+        path.write_text('[{"game": "Lakers"}, {"game": "Warriors"}]')
+        assert [d["content"] for d in builder._process_json_data(str(path))] == ["game: Lakers", "game: Warriors"]
+        path.write_text('{"venue": "Arena", "seats": {"row": 5}}')
+        assert [d["id"] for d in builder._process_json_data(str(path))] == ["json_venue", "json_seats"]
+    
+    def test_utf8_bom(self, builder, tmp_path):
+        """A leading UTF-8 BOM is accepted rather than yielding nothing"""
+        path = tmp_path / "tickets.json"
+        path.write_bytes(b"\xef\xbb\xbf" + json.dumps([{"a": 1}, {"b": 2}]).encode())
+        assert len(builder._process_json_data(str(path))) == 2
+    
+    @pytest.mark.parametrize("content", [b"", b"garbage", b"[{\"a\": 1}", b"  "])
+    def test_malformed_raises(self, builder, tmp_path, content):
+        """Empty and malformed files raise json's error instead of returning []"""
+        path = tmp_path / "tickets.json"
+        path.write_bytes(content)
+        with pytest.raises(json.JSONDecodeError):
+            builder._process_json_data(str(path))
+
+
+class TestProcessCsvData:
+    """Tests for SimpleKnowledgeBaseBuilder._process_csv_data"""
+    
+    def test_rows_joined_against_header(self, tmp_path):
+        """Blank cells are skipped and cells beyond the header go under None"""
+        path = tmp_path / "tickets.csv"
+        path.write_text("game,price\nLakers,100\n,50\n \nWarriors,80,VIP,row 5\n,,extra\n")
+        contents = [d["content"] for d in SimpleKnowledgeBaseBuilder()._process_csv_data(str(path))]
+        assert contents == [
+            "game: Lakers | price: 100",
+            "price: 50",
+            "",
+            "game: Warriors | price: 80 | None: ['VIP', 'row 5']",
+            "None: ['extra']",
+        ]
+
+
+@pytest.fixture(params=[True, False], ids=["numpy", "python"])
+def search_builder(request, monkeypatch):
+    """A builder scoring with and without NumPy"""
+    if request.param and not simple_knowledge_base.HAS_NUMPY:
+        pytest.skip("numpy not installed")
+    monkeypatch.setattr(simple_knowledge_base, "HAS_NUMPY", request.param)
+    return SimpleKnowledgeBaseBuilder()
+
+
+class TestSearchDocuments:
+    """Tests for SimpleKnowledgeBaseBuilder.search_documents"""
+    
+    def test_ranked_substring_matches(self, search_builder):
+        """Documents rank by query words contained, ties in document order"""
+        docs = [{"content": "Parking opens early"}, {"content": "Refund policy: full refunds"}, {"content": "refundable parking"}]
+        assert search_builder.search_documents(docs, "refund parking", top_k=3) == [docs[2], docs[0], docs[1]]
+        assert search_builder.search_documents(docs, "REFUND", top_k=1) == [docs[1]]
+        assert search_builder.search_documents(docs, "courtside", top_k=3) == []
+    
+    def test_replaced_document_is_searched(self, search_builder):
+        """Replacing a document in the same list is picked up by the next search"""
+        docs = [{"content": "Lower bowl seats"}, {"content": "Refund policy"}]
+        assert search_builder.search_documents(docs, "refund") == [docs[1]]
+        docs[1] = {"content": "parking again"}
+        assert search_builder.search_documents(docs, "refund") == []
+        assert search_builder.search_documents(docs, "again") == [docs[1]]
+    
+    def test_edited_content_is_searched(self, search_builder):
+        """Editing a document's content in place is picked up too"""
+        docs = [{"content": "Lower bowl seats"}, {"content": "Refund policy"}]
+        assert search_builder.search_documents(docs, "seats") == [docs[0]]
+        docs[0]["content"] = "Courtside rows"
+        assert search_builder.search_documents(docs, "seats") == []
+        assert search_builder.search_documents(docs, "courtside") == [docs[0]]
+
+
+class TestSplitTextIntoChunks:
+    """Tests for SimpleKnowledgeBaseBuilder._split_text_into_chunks"""
+    
+    TEXT = "a bb  ccc\tdddd\r\neeeee a bb ccc\n\ndddd eeeee"
+    
+    def test_whole_text(self):
+        """Words are packed up to chunk_size with whitespace collapsed"""
+        chunks = list(SimpleKnowledgeBaseBuilder()._split_text_into_chunks([self.TEXT], chunk_size=10))
+        assert chunks == ["a bb ccc", "dddd eeeee", "a bb ccc", "dddd eeeee"]
+    
+    @pytest.mark.parametrize("window", [1, 2, 3, 5, 7])
+    def test_windows_match_whole_text(self, window):
+        """Chunk boundaries do not depend on how the text is windowed"""
+        builder = SimpleKnowledgeBaseBuilder()
+        pieces = [self.TEXT[i:i + window] for i in range(0, len(self.TEXT), window)]
+        for chunk_size in (1, 3, 6, 10, 500):
+            assert list(builder._split_text_into_chunks(pieces, chunk_size)) == \
+                list(builder._split_text_into_chunks([self.TEXT], chunk_size))